@@ -0,0 +1,124 @@
+import hashlib
+import logging
+
+import pandas as pd
+
+import instrumentation
+from blocks import TOTAL_KEYWORDS
+from ledger import billing_by_period, concat_ledgers, ledger_cache, open_by_period, open_items, open_total
+from lru import LRUCache
+
+logger = logging.getLogger(__name__)
+
+# Quantidade de agregados mantidos em cache (todas as versões, de todas as sessões)
+CACHE_SIZE = 128
+
+# Palavras-chave de fim de bloco nos painéis dos contratos, quando diferem do padrão
+# (`blocks.TOTAL_KEYWORDS`): o painel da UPAS só fecha um bloco numa linha "TOTAL"
+PANEL_END_KEYWORDS = {"UPAS": ('TOTAL',)}
+
+
+class AggregateCache:
+    """Agregados das telas, guardados pelo hash do conteúdo das abas de origem.
+
+    A chave é o nome do agregado, o hash do conteúdo de cada aba usada
+    (`LedgerCache.version(...).digest`) e os parâmetros; não depende da URL
+    nem do TTL. Enquanto os dados não mudam, navegação e novas execuções,
+    de qualquer sessão, só leem o resultado pronto. Os resultados são
+    compartilhados: não devem ser modificados.
+    """
+
+    def __init__(self, ledgers=ledger_cache, size=CACHE_SIZE):
+        self.ledgers = ledgers
+        self._results = LRUCache(size)
+
+    def _versions(self, abas, end_keywords):
+        versoes = {}
+        for contrato, df in abas.items():
+            try:
+                versoes[contrato] = self.ledgers.version(contrato, df, end_keywords)
+            except Exception as e:
+                # Aba que não pôde ser convertida fica fora do agregado (como antes, no loop de cada tela)
+                logger.warning("Aba %s ignorada nos agregados: %s", contrato, e)
+        return versoes
+
+    def get(self, nome, abas, func, *params, end_keywords=TOTAL_KEYWORDS):
+        """Resultado de `func({contrato: livro}, *params)` para as `abas` ({contrato: DataFrame}).
+
+        Os livros são segmentados com `end_keywords` (fim de bloco).
+        """
+        end_keywords = tuple(end_keywords)
+        versoes = self._versions(abas, end_keywords)
+        chave = (nome, end_keywords, tuple((contrato, versao.digest) for contrato, versao in versoes.items()), params)
+        resultado = self._results.get(chave, self)
+        if resultado is not self:
+            instrumentation.record("agregado", nome=nome, cache="hit")
+            return resultado
+        with instrumentation.span("agregado", nome=nome, cache="miss"):
+            resultado = func({contrato: versao.ledger for contrato, versao in versoes.items()}, *params)
+        self._results.put(chave, resultado)
+        return resultado
+
+    def clear(self):
+        self._results.clear()
+
+
+# Agregados de todas as telas (linha do tempo, valores em aberto, últimos meses), de todas as sessões
+aggregate_cache = AggregateCache()
+
+
+def content_digest(valores):
+    """Hash do conteúdo de um agregado (Series ou DataFrame: índice e valores)"""
+    return hashlib.sha1(pd.util.hash_pandas_object(valores, index=True).to_numpy().tobytes()).hexdigest()
+
+
+def _contract_aggregate(nome, contrato, df, func, *params, end_keywords=TOTAL_KEYWORDS):
+    """`func(livro, *params)` de um contrato, guardado pelo hash da aba dele (None se a aba não pôde ser convertida).
+
+    Base dos agregados de vários contratos: quando uma aba muda, só o
+    agregado daquele contrato é recalculado; os demais vêm do cache.
+    """
+    def calcular(livros, *params):
+        livro = livros.get(contrato)
+        return None if livro is None else func(livro, *params)
+    return aggregate_cache.get(nome, {contrato: df}, calcular, *params, end_keywords=end_keywords)
+
+
+def billing_timeline(abas):
+    """Faturamento por competência somando todos os contratos (linha do tempo da visão geral)"""
+    def calcular(livros):
+        parciais = [_contract_aggregate("faturamento_contrato", contrato, abas[contrato], billing_by_period) for contrato in livros]
+        parciais = [parcial for parcial in parciais if parcial is not None and len(parcial)]
+        if not parciais:
+            return billing_by_period(concat_ledgers([]))
+        return pd.concat(parciais).groupby(level='period').sum().sort_index()
+    return aggregate_cache.get("faturamento_por_mes", abas, calcular)
+
+
+def open_by_contract(abas):
+    """{contrato: valor em aberto} dos contratos com valor em aberto positivo"""
+    def calcular(livros):
+        totais = {contrato: _contract_aggregate("aberto_contrato", contrato, abas[contrato], open_total) for contrato in livros}
+        return {contrato: total for contrato, total in totais.items() if total is not None and total > 0}
+    return aggregate_cache.get("valores_aberto_por_contrato", abas, calcular)
+
+
+def open_summary(contrato, df):
+    """(valor em aberto por competência, total em aberto, quantidade de lançamentos em aberto) do contrato.
+
+    Se a aba não puder ser convertida, o resumo vem vazio (nenhum valor em aberto).
+    """
+    def calcular(livros):
+        livro = livros.get(contrato, concat_ledgers([]))
+        return open_by_period(livro), open_total(livro), len(open_items(livro))
+    return aggregate_cache.get("valores_por_mes", {contrato: df}, calcular,
+                               end_keywords=PANEL_END_KEYWORDS.get(contrato, TOTAL_KEYWORDS))
+
+
+def last_billing_months(contrato, df, meses, somente_positivos=True):
+    """Faturamento das últimas `meses` competências do contrato (ver `billing_by_period`; vazio se a aba não puder ser convertida)"""
+    def calcular(livros, meses, somente_positivos):
+        livro = livros.get(contrato, concat_ledgers([]))
+        return billing_by_period(livro, somente_positivos).tail(meses)
+    return aggregate_cache.get("meses_faturamento_dados", {contrato: df}, calcular, meses, somente_positivos,
+                               end_keywords=PANEL_END_KEYWORDS.get(contrato, TOTAL_KEYWORDS))
@@ -0,0 +1,75 @@
+"""Benchmark: conversão de valores em reais com a cadeia de str.replace x money.parse_brl.
+
+Gera uma coluna sintética (1 milhão de células por padrão) no formato da
+planilha ("R$ 1.234,56", células vazias, negativos) e compara:
+
+- a cadeia de str.replace + pd.to_numeric que o app usava em cada tela;
+- money.parse_brl (funções do Arrow na coluna inteira: substituições
+  literais, regex ancorado para o "R$" do início e cast para float);
+- a formatação célula a célula (formatar_valor) x money.format_brl_column.
+
+Uso: python benchmarks/bench_brl.py [--cells 1000000] [--repeat 3]
+"""
+import argparse
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from common import medir  # noqa: E402
+from money import format_brl_column, parse_brl  # noqa: E402
+
+
+def gerar_coluna(n_celulas, seed=0):
+    rng = np.random.default_rng(seed)
+    valores = rng.uniform(-5_000, 2_000_000, n_celulas).round(2)
+    texto = pd.Series(valores).map('{:,.2f}'.format).str.translate(str.maketrans(',.', '.,'))
+    coluna = 'R$ ' + texto
+    # Algumas células vazias, como nas linhas COMPETÊNCIA/TOTAL da planilha
+    coluna[rng.random(n_celulas) < 0.05] = ''
+    return coluna, valores
+
+
+def cadeia_antiga(coluna):
+    coluna = coluna.astype(str)
+    coluna = coluna.str.replace('R$', '', regex=False)
+    coluna = coluna.str.replace('R ', '', regex=False)
+    coluna = coluna.str.replace(' ', '', regex=False)
+    coluna = coluna.str.replace(r'\.(?=\d{3})', '', regex=True)
+    coluna = coluna.str.replace(',', '.')
+    coluna = coluna.str.strip()
+    return pd.to_numeric(coluna, errors='coerce')
+
+
+def formatar_valor(valor):
+    if pd.isna(valor) or valor == 0:
+        return "R$ 0,00"
+    valor_str = f"{valor:,.2f}"
+    valor_str = valor_str.replace(',', 'X').replace('.', ',').replace('X', '.')
+    return f"R$ {valor_str}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--cells", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    coluna, _ = gerar_coluna(args.cells)
+    print(f"{args.cells} células")
+    print()
+
+    antigo = medir("parse: cadeia de str.replace", lambda: cadeia_antiga(coluna), args.repeat)
+    novo = medir("parse: money.parse_brl", lambda: parse_brl(coluna), args.repeat)
+    assert np.allclose(antigo.to_numpy(), novo.to_numpy(), equal_nan=True), "resultados diferentes"
+
+    print()
+    medir("format: formatar_valor", lambda: [formatar_valor(valor) for valor in novo], args.repeat)
+    medir("format: money.format_brl_column", lambda: format_brl_column(novo), args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""Benchmark: pico de memória (RSS) do app em cada página.
+
+Gera um diretório sintético (planilha principal com coluna de empresa e
+uma aba por contrato) e executa cada página do app com o AppTest do
+Streamlit em um processo novo, medindo o pico de RSS do processo (o
+processo inteiro: interpretador, Streamlit, pandas e os dados) na
+primeira execução e nas reexecuções seguintes, com os dados já em cache
+(o pico é reiniciado entre as duas medições; no Linux).
+
+Para comparar com outra versão do app, aponte --app para o app.py de
+outra cópia do repositório (ex.: um `git worktree` do commit anterior).
+
+Uso: python benchmarks/bench_memory.py [--rows 200000] [--contract-rows 2000] [--reruns 3] [--app caminho/app.py]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+from common import CONTRATOS, PAGINAS, gerar_diretorio
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _pico_mb():
+    try:
+        with open("/proc/self/status", encoding="ascii") as f:
+            return next(int(linha.split()[1]) / 1024 for linha in f if linha.startswith("VmHWM:"))
+    except OSError:
+        import resource
+        # ru_maxrss vem em KB no Linux e em bytes no macOS
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / (1024 * 1024 if sys.platform == "darwin" else 1024)
+
+
+def _zerar_pico():
+    """Reinicia o pico de RSS do processo (só no Linux); False se não for possível"""
+    try:
+        with open("/proc/self/clear_refs", "w", encoding="ascii") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def medir_pagina(app, pagina, reexecucoes):
+    """Executado no processo filho: roda a página e devolve o pico de RSS em MB.
+
+    A primeira execução inclui o download e o parse dos dados; nas
+    reexecuções (cliques, navegação) os dados já estão em cache, então o
+    pico delas mostra o custo da página em si.
+    """
+    # Só o diretório do app no path: os módulos vêm da mesma cópia do repositório
+    sys.path.insert(0, os.path.dirname(os.path.abspath(app)))
+    from streamlit.testing.v1 import AppTest
+
+    teste = AppTest.from_file(app, default_timeout=120)
+    teste.session_state["selected_nav"] = pagina
+    teste.run()
+    primeira = _pico_mb()
+    erros = [e.value for e in teste.exception]
+    rss_antes = reexecucao = None
+    if reexecucoes and _zerar_pico():
+        with open("/proc/self/status", encoding="ascii") as f:
+            rss_antes = next(int(linha.split()[1]) / 1024 for linha in f if linha.startswith("VmRSS:"))
+        for _ in range(reexecucoes):
+            teste.run()
+        reexecucao = _pico_mb()
+    return {"pagina": pagina, "primeira_mb": primeira, "rss_mb": rss_antes, "reexecucao_mb": reexecucao, "erros": erros}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=200_000, help="linhas da planilha principal")
+    parser.add_argument("--contract-rows", type=int, default=2_000, help="linhas de cada aba de contrato")
+    parser.add_argument("--app", default=os.path.join(RAIZ, "app.py"))
+    parser.add_argument("--reruns", type=int, default=3, help="reexecuções medidas depois da primeira")
+    parser.add_argument("--pagina", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.pagina:
+        print(json.dumps(medir_pagina(args.app, args.pagina, args.reruns)))
+        return
+
+    with tempfile.TemporaryDirectory() as diretorio:
+        gerar_diretorio(diretorio, args.rows, args.contract_rows)
+        env = dict(os.environ, DATA_URL=f"file://{diretorio}", SNAPSHOT_DIR="", REFRESH_INTERVAL="0")
+        print(f"{args.rows} linhas na planilha principal, {len(CONTRATOS)} abas x {args.contract_rows} linhas")
+        print(f"app: {args.app}")
+        print()
+        for pagina in PAGINAS:
+            saida = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), "--pagina", pagina, "--app", args.app, "--reruns", str(args.reruns)],
+                env=env, capture_output=True, text=True, check=True,
+            )
+            resultado = json.loads(saida.stdout.strip().splitlines()[-1])
+            erros = f"  erros: {resultado['erros']}" if resultado["erros"] else ""
+            linha = f"{pagina:<12} pico na 1ª execução {resultado['primeira_mb']:7.1f} MB"
+            if resultado["reexecucao_mb"] is not None:
+                acrescimo = resultado["reexecucao_mb"] - resultado["rss_mb"]
+                linha += f" | pico nas reexecuções {resultado['reexecucao_mb']:7.1f} MB (+{acrescimo:.1f} MB sobre o RSS em repouso)"
+            print(linha + erros)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""Benchmark: bytes enviados ao navegador (mensagens do websocket) por execução do app.
+
+Gera um diretório sintético (planilha principal e uma aba por contrato),
+executa cada página com o AppTest do Streamlit e soma o tamanho das
+mensagens (ForwardMsg serializadas) que o app envia ao navegador: a
+primeira execução da sessão e as reexecuções seguintes (cliques,
+navegação), que são as que se repetem durante o uso.
+
+Para comparar com outra versão do app, aponte --app para o app.py de
+outra cópia do repositório (ex.: um `git worktree` do commit anterior).
+
+Uso: python benchmarks/bench_payload.py [--reruns 3] [--app caminho/app.py]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+from common import PAGINAS, gerar_diretorio
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Tamanho dos dados sintéticos: o que importa aqui é o HTML e as mensagens, não o volume
+N_LINHAS = 2_000
+N_LINHAS_CONTRATO = 400
+
+
+def medir_pagina(app, pagina, reexecucoes):
+    """Executado no processo filho: bytes enviados em cada execução da página"""
+    # Só o diretório do app no path: os módulos vêm da mesma cópia do repositório
+    sys.path.insert(0, os.path.dirname(os.path.abspath(app)))
+    from streamlit.runtime.scriptrunner_utils.script_run_context import ScriptRunContext
+    from streamlit.testing.v1 import AppTest
+
+    enviados = []
+    enqueue = ScriptRunContext.enqueue
+
+    def contar(self, msg):
+        enviados[-1] += msg.ByteSize()
+        return enqueue(self, msg)
+
+    ScriptRunContext.enqueue = contar
+    teste = AppTest.from_file(app, default_timeout=120)
+    teste.session_state["selected_nav"] = pagina
+    for _ in range(1 + reexecucoes):
+        enviados.append(0)
+        teste.run()
+    return {"pagina": pagina, "bytes": enviados, "erros": [e.value for e in teste.exception]}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--reruns", type=int, default=3, help="reexecuções medidas depois da primeira")
+    parser.add_argument("--app", default=os.path.join(RAIZ, "app.py"))
+    parser.add_argument("--pagina", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.pagina:
+        print(json.dumps(medir_pagina(args.app, args.pagina, args.reruns)))
+        return
+
+    with tempfile.TemporaryDirectory() as diretorio:
+        gerar_diretorio(diretorio, N_LINHAS, N_LINHAS_CONTRATO)
+        env = dict(os.environ, DATA_URL=f"file://{diretorio}", SNAPSHOT_DIR="", REFRESH_INTERVAL="0")
+        print(f"app: {args.app}")
+        print()
+        for pagina in PAGINAS:
+            # O processo roda no diretório do app, como o `streamlit run` (lê o .streamlit/config.toml de lá)
+            saida = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), "--pagina", pagina, "--app", args.app, "--reruns", str(args.reruns)],
+                env=env, capture_output=True, text=True, check=True, cwd=os.path.dirname(os.path.abspath(args.app)),
+            )
+            resultado = json.loads(saida.stdout.strip().splitlines()[-1])
+            primeira, reexecucoes = resultado["bytes"][0], resultado["bytes"][1:]
+            media = sum(reexecucoes) / len(reexecucoes) if reexecucoes else 0
+            erros = f"  erros: {resultado['erros']}" if resultado["erros"] else ""
+            print(f"{pagina:<12} 1ª execução {primeira / 1024:8.1f} KB | reexecução {media / 1024:8.1f} KB{erros}")
+
+
+if __name__ == "__main__":
+    main()
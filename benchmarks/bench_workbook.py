@@ -0,0 +1,134 @@
+"""Benchmark: uma requisição CSV por aba x planilha inteira em um único XLSX.
+
+Gera uma planilha sintética (20 abas por padrão) e a serve em um servidor
+HTTP local com latência artificial, simulando o Google Sheets. Compara:
+
+- abas em série (como o app fazia com pd.read_csv em loop);
+- abas em paralelo (sheets.TabCache);
+- planilha inteira em XLSX, parseada com o leitor streaming (sheets.parse_workbook).
+
+Uso: python benchmarks/bench_workbook.py [--tabs 20] [--rows 400] [--latency 0.15]
+"""
+import argparse
+import csv
+import io
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import openpyxl
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from common import medir  # noqa: E402
+from sheets import TabCache, http_get, parse_workbook  # noqa: E402
+
+
+MESES = ["JANEIRO", "FEVEREIRO", "MARÇO", "ABRIL", "MAIO", "JUNHO",
+         "JULHO", "AGOSTO", "SETEMBRO", "OUTUBRO", "NOVEMBRO", "DEZEMBRO"]
+
+
+def gerar_abas(n_abas, n_linhas):
+    """Abas no formato dos contratos: blocos COMPETÊNCIA → linhas → TOTAL, um mês por bloco"""
+    abas = {}
+    for aba in range(n_abas):
+        linhas = [["MÊS", "UNIDADE", "SITUAÇÃO", "TOTAL", "A", "B", "C", "VALOR"]]
+        for i in range(n_linhas):
+            if i % 20 == 0:
+                linhas.append(["COMPETÊNCIA", "", "", "", "", "", "", ""])
+            elif i % 20 == 19:
+                linhas.append(["TOTAL", "", "", "R$ 99.999,99", "", "", "", "R$ 1.234,00"])
+            else:
+                bloco = i // 20
+                mes = f"{MESES[bloco % 12]}/{2025 + bloco // 12}" if i % 20 == 1 else ""
+                linhas.append([mes, f"UNIDADE {i}", "OK" if i % 3 else "PENDENTE",
+                               f"R$ {aba * 1000 + i}.{i % 1000:03d},{i % 100:02d}", i, i * 2, i * 3, f"R$ {i},50"])
+        abas[f"CONTRATO {aba + 1:02d}"] = linhas
+    return abas
+
+
+def csv_bytes(linhas):
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(linhas)
+    return buffer.getvalue().encode()
+
+
+def xlsx_bytes(abas):
+    workbook = openpyxl.Workbook()
+    workbook.remove(workbook.active)
+    for titulo, linhas in abas.items():
+        worksheet = workbook.create_sheet(titulo)
+        for linha in linhas:
+            worksheet.append([v if v != "" else None for v in linha])
+    buffer = io.BytesIO()
+    workbook.save(buffer)
+    return buffer.getvalue()
+
+
+def iniciar_servidor(arquivos, latencia):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            time.sleep(latencia)
+            corpo = arquivos[self.path]
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(corpo)))
+            self.end_headers()
+            self.wfile.write(corpo)
+
+        def log_message(self, *args):
+            pass
+
+    servidor = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    return servidor
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tabs", type=int, default=20)
+    parser.add_argument("--rows", type=int, default=400)
+    parser.add_argument("--latency", type=float, default=0.15, help="latência por requisição, em segundos")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    abas = gerar_abas(args.tabs, args.rows)
+    arquivos = {f"/tab/{i}.csv": csv_bytes(linhas) for i, linhas in enumerate(abas.values())}
+    arquivos["/workbook.xlsx"] = xlsx_bytes(abas)
+    servidor = iniciar_servidor(arquivos, args.latency)
+    base = f"http://127.0.0.1:{servidor.server_port}"
+    urls = {titulo: f"{base}/tab/{i}.csv" for i, titulo in enumerate(abas)}
+
+    bytes_csv = sum(len(corpo) for caminho, corpo in arquivos.items() if caminho.endswith(".csv"))
+    print(f"{args.tabs} abas x {args.rows} linhas, latência {args.latency * 1000:.0f} ms")
+    print(f"CSV: {args.tabs} requisições, {bytes_csv / 1024:.0f} KB | XLSX: 1 requisição, {len(arquivos['/workbook.xlsx']) / 1024:.0f} KB")
+    print()
+
+    def serial():
+        return {titulo: pd.read_csv(io.BytesIO(http_get(url).content)) for titulo, url in urls.items()}
+
+    def paralelo():
+        # Cache novo a cada rodada para medir o download, não o cache
+        return TabCache().get_urls(urls)
+
+    def workbook():
+        return parse_workbook(http_get(f"{base}/workbook.xlsx").content)
+
+    corpo_xlsx = arquivos["/workbook.xlsx"]
+
+    medir("abas em série (CSV)", serial, args.repeat)
+    medir("abas em paralelo (CSV)", paralelo, args.repeat)
+    resultado = medir("planilha inteira (XLSX)", workbook, args.repeat)
+    medir("  só o parse do XLSX", lambda: parse_workbook(corpo_xlsx), args.repeat)
+    medir("  só o parse dos CSVs", lambda: [pd.read_csv(io.BytesIO(arquivos[f"/tab/{i}.csv"])) for i in range(args.tabs)], args.repeat)
+
+    assert list(resultado) == list(abas), "abas do XLSX não correspondem às geradas"
+    servidor.shutdown()
+
+
+if __name__ == "__main__":
+    main()
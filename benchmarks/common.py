@@ -0,0 +1,48 @@
+"""Funções comuns dos benchmarks.
+
+- `gerar_diretorio`: dados sintéticos dos benchmarks que executam o app
+  (bench_memory, bench_payload), em um diretório no formato de
+  `sources.DirectorySource`: planilha principal (principal.csv, com a
+  coluna de empresa) e uma aba por contrato (<CONTRATO>.csv, em blocos
+  COMPETÊNCIA → linhas → TOTAL);
+- `medir`: melhor tempo de várias execuções (bench_brl, bench_workbook).
+"""
+import csv
+import os
+import time
+
+PAGINAS = ["Geral", "Viva Saúde", "Coop Vitta", "Delta"]
+CONTRATOS = ["UPAS", "EVOLUIR", "CPSS", "CRATEUS", "ITAPIPOCA"]
+EMPRESAS = ["Viva Saúde", "Coop Vitta", "Delta"]
+
+
+def gerar_diretorio(diretorio, n_linhas, n_linhas_contrato):
+    with open(os.path.join(diretorio, "principal.csv"), "w", newline="", encoding="utf-8") as f:
+        escritor = csv.writer(f)
+        escritor.writerow(["EMPRESA", "DATA", "DESCRIÇÃO", "SITUAÇÃO", "VALOR"])
+        for i in range(n_linhas):
+            escritor.writerow([EMPRESAS[i % 3], f"{i % 28 + 1:02d}/{i % 12 + 1:02d}/2025",
+                               f"Lançamento {i}", "OK" if i % 4 else "PENDENTE", f"R$ {i % 9_999},{i % 100:02d}"])
+    meses = ["JULHO", "AGOSTO", "SETEMBRO", "OUTUBRO", "NOVEMBRO", "DEZEMBRO"]
+    for contrato in CONTRATOS:
+        with open(os.path.join(diretorio, f"{contrato}.csv"), "w", newline="", encoding="utf-8") as f:
+            escritor = csv.writer(f)
+            escritor.writerow(["MÊS", "UNIDADE", "SITUAÇÃO", "TOTAL", "A", "B", "C", "VALOR"])
+            for i in range(n_linhas_contrato):
+                if i % 20 == 0:
+                    escritor.writerow(["COMPETÊNCIA", "", "", "", "", "", "", ""])
+                elif i % 20 == 19:
+                    escritor.writerow(["TOTAL", "", "", "R$ 99.999,99", "", "", "", "R$ 1.234,00"])
+                else:
+                    mes = f"{meses[i // 20 % len(meses)]}/2025" if i % 20 == 1 else ""
+                    escritor.writerow([mes, f"UNIDADE {i}", "OK" if i % 3 else "PENDENTE", f"R$ {i}.{i % 1000:03d},50", i, i * 2, i * 3, f"R$ {i},50"])
+
+
+def medir(nome, func, repeticoes):
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        resultado = func()
+        tempos.append(time.perf_counter() - inicio)
+    print(f"{nome:<32} {min(tempos) * 1000:9.1f} ms (melhor de {repeticoes})")
+    return resultado
@@ -0,0 +1,98 @@
+import re
+
+import numpy as np
+import pandas as pd
+
+from periods import parse_periods, resolve_periods
+
+# Palavras-chave das linhas que abrem e fecham cada bloco
+COMPETENCIA_KEYWORDS = ('COMPET',)
+TOTAL_KEYWORDS = ('TOT',)
+
+# Quantas linhas depois da COMPETENCIA são examinadas em busca do mês
+MONTH_LOOKAHEAD = 4
+
+
+def _labels(df, coluna):
+    return df[coluna].astype(str).str.strip().str.upper()
+
+
+def _contains_any(labels, keywords):
+    pattern = '|'.join(re.escape(keyword) for keyword in keywords)
+    return labels.str.contains(pattern, regex=True, na=False).to_numpy(dtype=bool)
+
+
+def segment_blocks(df, coluna_mes, coluna_total=None, start_keywords=COMPETENCIA_KEYWORDS,
+                   end_keywords=TOTAL_KEYWORDS):
+    """Divide a planilha de um contrato em blocos COMPETENCIA → TOTAL.
+
+    Cada linha cujo rótulo (`coluna_mes`) contém uma das `start_keywords`
+    abre um bloco; o bloco termina na primeira linha com `end_keywords`
+    depois dele, na linha anterior à próxima COMPETENCIA ou no fim da
+    planilha. Linhas TOTAL fora de um bloco são ignoradas.
+
+    Retorna um DataFrame com uma linha por bloco, na ordem da planilha:
+    `start` e `end` (posições das linhas, inclusivas), `period` (competência
+    mensal, `pd.Period`), `total` (valor de `coluna_total` na linha final,
+    se informada) e `closed` (se a linha final é uma linha TOTAL).
+
+    A competência vem da primeira linha logo após a COMPETENCIA cujo rótulo
+    é um mês ("OUTUBRO", "10/2025", data...). Meses sem ano e blocos sem
+    mês são completados pela sequência dos blocos (ver
+    `periods.resolve_periods`); sem nenhuma referência, ficam NaT.
+    """
+    colunas = ['start', 'end', 'period', 'total', 'closed']
+    n = len(df)
+    if n == 0:
+        return _empty(colunas)
+
+    labels = _labels(df, coluna_mes)
+    is_start = _contains_any(labels, start_keywords)
+    is_end = _contains_any(labels, end_keywords) & ~is_start
+
+    starts = np.flatnonzero(is_start)
+    if len(starts) == 0:
+        return _empty(colunas)
+
+    # Número do bloco de cada linha (0 = antes da primeira COMPETENCIA)
+    block = np.cumsum(is_start)
+    ends_pos = np.flatnonzero(is_end & (block > 0))
+    ends_block = block[ends_pos]
+    primeiro = np.r_[True, ends_block[1:] != ends_block[:-1]] if len(ends_block) else np.zeros(0, dtype=bool)
+
+    # Sem TOTAL: fecha antes da próxima COMPETENCIA (ou no fim da planilha)
+    ends = np.r_[starts[1:] - 1, n - 1]
+    ends[ends_block[primeiro] - 1] = ends_pos[primeiro]
+    closed = np.zeros(len(starts), dtype=bool)
+    closed[ends_block[primeiro] - 1] = True
+
+    # Competência: primeira linha com mês entre as seguintes à COMPETENCIA
+    anos_linha, meses_linha = parse_periods(df[coluna_mes])
+    month_rows = np.flatnonzero(meses_linha)
+    anos = np.zeros(len(starts), dtype=np.int32)
+    meses = np.zeros(len(starts), dtype=np.int32)
+    if len(month_rows):
+        candidato = np.searchsorted(month_rows, starts + 1)
+        limite = np.minimum(starts + MONTH_LOOKAHEAD, ends)
+        valido = candidato < len(month_rows)
+        candidato = np.minimum(candidato, len(month_rows) - 1)
+        valido &= month_rows[candidato] <= limite
+        linhas = month_rows[candidato[valido]]
+        anos[valido] = anos_linha[linhas]
+        meses[valido] = meses_linha[linhas]
+
+    totals = df[coluna_total].to_numpy()[ends] if coluna_total is not None else np.full(len(starts), np.nan)
+
+    return pd.DataFrame({
+        'start': starts,
+        'end': ends,
+        'period': resolve_periods(anos, meses),
+        'total': totals,
+        'closed': closed,
+    }, columns=colunas)
+
+
+def _empty(colunas):
+    blocos = pd.DataFrame(columns=colunas)
+    blocos['period'] = pd.PeriodIndex([], freq='M')
+    return blocos
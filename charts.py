@@ -0,0 +1,194 @@
+import json
+
+import plotly.graph_objects as go
+
+from aggregates import content_digest
+from components import FragmentCache
+from money import format_brl_column
+from periods import period_label
+
+# Quantidade de gráficos mantidos em cache (todas as versões, de todas as sessões)
+CACHE_SIZE = 32
+
+# Cores de cada empresa (gráfico de pizza) e de cada contrato (valores em aberto)
+CORES_EMPRESAS = {
+    'Viva Saúde': '#3b82f6',
+    'Coop Vitta': '#8b5cf6',
+    'Delta': '#10b981'
+}
+CORES_CONTRATOS = {
+    "UPAS": "#ef4444",
+    "EVOLUIR": "#f59e0b",
+    "CPSS": "#8b5cf6",
+    "CRATEUS": "#10b981",
+    "ITAPIPOCA": "#3b82f6"
+}
+
+# Spec JSON de cada gráfico (linha do tempo, pizza, barras), guardada pelos dados que a geram
+figure_cache = FragmentCache(CACHE_SIZE, kind="grafico")
+
+
+def _figure(nome, chave, build, *dados):
+    """Figura montada a partir da spec em cache (a spec só é gerada quando a chave muda).
+
+    A spec já foi validada pelo plotly ao ser gerada, então a figura é
+    remontada sem validação; cada execução recebe um objeto próprio.
+    """
+    spec = figure_cache.get(nome, chave, lambda *dados: build(*dados).to_json(), *dados)
+    return go.Figure(json.loads(spec), _validate=False)
+
+
+def _build_timeline(faturamento_mensal):
+    meses_ordenados = [period_label(periodo, curto=True) for periodo in faturamento_mensal.index]
+    valores_ordenados = faturamento_mensal.tolist()
+
+    fig_linha_tempo = go.Figure()
+
+    fig_linha_tempo.add_trace(go.Scatter(
+        x=meses_ordenados,
+        y=valores_ordenados,
+        mode='lines+markers',
+        name='Faturamento Total',
+        line=dict(color='#3b82f6', width=3),
+        marker=dict(size=12, color='#3b82f6', line=dict(width=2, color='white')),
+        fill='tonexty',
+        fillcolor='rgba(59, 130, 246, 0.15)',
+        hovertemplate='<b>%{x}</b><br>Faturamento: R$ %{y:,.2f}<extra></extra>'
+    ))
+
+    fig_linha_tempo.update_layout(
+        title={
+            'text': 'Faturamento Mensal - Viva Saúde (Todos os Contratos)',
+            'font': {'size': 18, 'color': 'white'},
+            'x': 0.5,
+            'xanchor': 'center'
+        },
+        xaxis=dict(
+            title=dict(text='Mês', font=dict(size=14, color='white')),
+            tickfont=dict(size=12, color='white'),
+            gridcolor='rgba(255, 255, 255, 0.1)',
+            categoryorder='array',
+            categoryarray=meses_ordenados
+        ),
+        yaxis=dict(
+            title=dict(text='Faturamento (R$)', font=dict(size=14, color='white')),
+            tickfont=dict(size=12, color='white'),
+            gridcolor='rgba(255, 255, 255, 0.1)',
+            tickformat=',.0f'
+        ),
+        paper_bgcolor='rgba(0,0,0,0)',
+        plot_bgcolor='rgba(0,0,0,0)',
+        font=dict(color='white'),
+        height=400,
+        margin=dict(l=50, r=20, t=50, b=50),
+        hovermode='x unified'
+    )
+    return fig_linha_tempo
+
+
+def timeline_figure(faturamento_mensal):
+    """Linha do tempo do faturamento por competência (None se não houver nenhuma competência)"""
+    if len(faturamento_mensal) == 0:
+        return None
+    return _figure("linha_tempo", content_digest(faturamento_mensal), _build_timeline, faturamento_mensal)
+
+
+def _build_pie(empresas):
+    valores = [1] * len(empresas)  # Cada empresa tem peso igual
+
+    fig_pizza = go.Figure(data=[go.Pie(
+        labels=list(empresas),
+        values=valores,
+        hole=0.4,  # Donut chart
+        marker=dict(
+            colors=[CORES_EMPRESAS.get(empresa, '#6b7280') for empresa in empresas],
+            line=dict(color='rgba(255, 255, 255, 0.1)', width=2)
+        ),
+        textinfo='label+percent',
+        textfont=dict(size=14, color='white'),
+        hovertemplate='<b>%{label}</b><br>Status: Operacional<extra></extra>'
+    )])
+
+    fig_pizza.update_layout(
+        title={
+            'text': 'Distribuição dos Sistemas',
+            'font': {'size': 18, 'color': 'white'},
+            'x': 0.5,
+            'xanchor': 'center'
+        },
+        paper_bgcolor='rgba(0,0,0,0)',
+        plot_bgcolor='rgba(0,0,0,0)',
+        font=dict(color='white'),
+        showlegend=True,
+        legend=dict(
+            orientation="h",
+            yanchor="bottom",
+            y=-0.1,
+            xanchor="center",
+            x=0.5,
+            font=dict(size=12, color='white')
+        ),
+        height=400,
+        margin=dict(l=20, r=20, t=50, b=50)
+    )
+    return fig_pizza
+
+
+def systems_pie_figure(empresas):
+    """Pizza (donut) com as empresas monitoradas, todas com o mesmo peso"""
+    empresas = tuple(empresas)
+    return _figure("pizza", empresas, _build_pie, empresas)
+
+
+def _build_open_values(valores_aberto_por_contrato):
+    contratos_com_aberto = [contrato for contrato, _ in valores_aberto_por_contrato]
+    valores_aberto = [valor for _, valor in valores_aberto_por_contrato]
+
+    fig_barras_aberto = go.Figure()
+
+    fig_barras_aberto.add_trace(go.Bar(
+        x=contratos_com_aberto,
+        y=valores_aberto,
+        name='Valores em Aberto',
+        marker=dict(
+            color=[CORES_CONTRATOS.get(contrato, '#6b7280') for contrato in contratos_com_aberto],
+            line=dict(color='rgba(255, 255, 255, 0.2)', width=1)
+        ),
+        text=format_brl_column(valores_aberto).tolist(),
+        textposition='outside',
+        textfont=dict(size=12, color='white'),
+        hovertemplate='<b>%{x}</b><br>Valor em Aberto: R$ %{y:,.2f}<extra></extra>'
+    ))
+
+    fig_barras_aberto.update_layout(
+        title={
+            'text': 'Pagamentos em Aberto por Contrato - Viva Saúde',
+            'font': {'size': 18, 'color': 'white'},
+            'x': 0.5,
+            'xanchor': 'center'
+        },
+        xaxis=dict(
+            title=dict(text='Contrato', font=dict(size=14, color='white')),
+            tickfont=dict(size=12, color='white'),
+            gridcolor='rgba(255, 255, 255, 0.1)'
+        ),
+        yaxis=dict(
+            title=dict(text='Valor em Aberto (R$)', font=dict(size=14, color='white')),
+            tickfont=dict(size=12, color='white'),
+            gridcolor='rgba(255, 255, 255, 0.1)',
+            tickformat=',.0f'
+        ),
+        paper_bgcolor='rgba(0,0,0,0)',
+        plot_bgcolor='rgba(0,0,0,0)',
+        font=dict(color='white'),
+        height=400,
+        margin=dict(l=50, r=20, t=50, b=50),
+        showlegend=False
+    )
+    return fig_barras_aberto
+
+
+def open_values_figure(valores_aberto_por_contrato):
+    """Barras com o valor em aberto de cada contrato ({contrato: valor})"""
+    itens = tuple((contrato, float(valor)) for contrato, valor in valores_aberto_por_contrato.items())
+    return _figure("barras_aberto", itens, _build_open_values, itens)
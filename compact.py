@@ -0,0 +1,121 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+from money import parse_brl
+
+# Compactar os tipos das colunas ao carregar as planilhas ("0" desativa)
+COMPACT_DTYPES = os.getenv("COMPACT_DTYPES", "1") == "1"
+
+# Fração máxima de valores distintos para uma coluna de texto virar categórica
+CATEGORY_RATIO = 0.5
+
+# Indício de valor em reais em uma célula de texto ("R$", "1.234,56")
+_MONEY_HINT = r'R\$|\d,\d{2}\b'
+
+_SMALL_INTS = [(dtype, np.iinfo(dtype.lower())) for dtype in ('Int8', 'Int16', 'Int32')]
+
+
+def _is_text(valores):
+    return valores.dtype == object or isinstance(valores.dtype, pd.StringDtype)
+
+
+def _money(valores):
+    """Coluna de texto em reais convertida para float (arredondada em centavos), ou None se não for.
+
+    Só converte se todas as células preenchidas forem valores; uma coluna
+    com rótulos misturados (TOTAL, observações) continua como texto.
+    """
+    texto = valores.dropna().astype(str).str.strip()
+    texto = texto[texto != '']
+    if len(texto) == 0 or not texto.str.contains(_MONEY_HINT, regex=True).any():
+        return None
+    numeros = parse_brl(valores)
+    if numeros[texto.index].isna().any():
+        return None
+    return numeros.round(2)
+
+
+def _small_int(valores):
+    """Coluna numérica só com inteiros no menor inteiro anulável que comporte os valores"""
+    if pd.api.types.is_bool_dtype(valores) or not (
+            pd.api.types.is_integer_dtype(valores) or pd.api.types.is_float_dtype(valores)):
+        return None
+    preenchidos = valores.dropna()
+    if len(preenchidos) == 0:
+        return None
+    numeros = preenchidos.to_numpy(dtype=float)
+    if not np.array_equal(numeros, np.floor(numeros)):
+        return None
+    menor, maior = numeros.min(), numeros.max()
+    for dtype, limites in _SMALL_INTS:
+        if limites.min <= menor and maior <= limites.max:
+            return valores.astype(dtype)
+    return None
+
+
+def _intern(valores):
+    """Textos repetidos de uma coluna object passam a apontar para o mesmo objeto str"""
+    return valores.map(lambda valor: sys.intern(valor) if isinstance(valor, str) else valor)
+
+
+def compact_column(valores):
+    """Versão compacta de uma coluna: valores em reais, inteiros pequenos, categórica ou textos internados"""
+    if isinstance(valores.dtype, pd.CategoricalDtype):
+        return valores
+    if not _is_text(valores):
+        compacta = _small_int(valores)
+        return valores if compacta is None else compacta
+
+    dinheiro = _money(valores)
+    if dinheiro is not None:
+        return dinheiro
+    n = len(valores)
+    if n and valores.nunique(dropna=True) <= n * CATEGORY_RATIO:
+        return valores.astype('category')
+    if valores.dtype == object:
+        return _intern(valores)
+    return valores
+
+
+def memory_report(antes, depois):
+    """Memória de cada coluna antes e depois da compactação (lista de dicionários)"""
+    bytes_antes = antes.memory_usage(deep=True, index=False)
+    bytes_depois = depois.memory_usage(deep=True, index=False)
+    return [
+        {
+            "coluna": str(coluna),
+            "tipo_antes": str(antes[coluna].dtype),
+            "tipo_depois": str(depois[coluna].dtype),
+            "bytes_antes": int(bytes_antes[coluna]),
+            "bytes_depois": int(bytes_depois[coluna]),
+        }
+        for coluna in antes.columns
+    ]
+
+
+def compact_frame(df):
+    """Compacta os tipos das colunas de `df`; retorna (DataFrame compacto, relatório de memória)"""
+    if not df.columns.is_unique:
+        return df, memory_report(df, df)
+    compacto = df.copy(deep=False)
+    for coluna in df.columns:
+        compacto[coluna] = compact_column(df[coluna])
+    return compacto, memory_report(df, compacto)
+
+
+def compact(data):
+    """`compact_frame` para um DataFrame ou para uma planilha inteira ({título: DataFrame}).
+
+    Retorna (dados compactos, relatório), com o relatório de todas as abas
+    (as colunas de cada aba vêm prefixadas com o título).
+    """
+    if not isinstance(data, dict):
+        return compact_frame(data)
+    abas, relatorio = {}, []
+    for titulo, df in data.items():
+        abas[titulo], colunas = compact_frame(df)
+        relatorio.extend(dict(item, coluna=f"{titulo}: {item['coluna']}") for item in colunas)
+    return abas, relatorio
@@ -0,0 +1,147 @@
+import html
+
+import instrumentation
+from aggregates import content_digest
+from lru import LRUCache
+from money import format_brl
+from periods import period_label
+
+# Quantidade de trechos de HTML mantidos em cache (todas as sessões)
+CACHE_SIZE = 256
+
+# Modelos dos componentes; a aparência fica nas classes de styles/theme.css
+_TABLE = (
+    '<div class="fin-table-wrap"><table class="fin-table fin-table-{variante}">'
+    '<thead><tr><th>Mês</th><th class="num">{coluna}</th></tr></thead>'
+    '<tbody>{linhas}</tbody></table></div>'
+)
+_ROW = '<tr><td>{rotulo}</td><td class="num">{valor}</td></tr>'
+_EMPTY_ROW = '<tr class="empty"><td colspan="2">{texto}</td></tr>'
+_TOTAL_ROW = '<tr class="total"><td>Total</td><td class="num">{valor}</td></tr>'
+
+_STAT = '<div class="stat-item{destaque}"><div class="stat-label">{rotulo}</div><div class="stat-value{classe}">{valor}</div></div>'
+# Lugar da hora da verificação no HTML em cache; a hora muda a cada execução e é inserida depois
+_VERIFICACAO = '<!--verificacao-->'
+_CARD = (
+    '<div class="system-card" id="{id}">'
+    '<div class="card-glow"></div>'
+    '<div class="card-header-modern">'
+    '<div class="card-icon-wrapper"><div class="card-icon">{icone}</div></div>'
+    '<div class="card-title-section">'
+    '<div class="card-title-modern">{titulo}</div>'
+    '<p class="card-subtitle">{subtitulo}</p>'
+    '</div>'
+    '</div>'
+    '<div class="card-body">'
+    '<div class="status-badge"{badge_id}>'
+    '<span class="status-indicator-modern {status}"{indicador_id}></span>'
+    '<span class="status-text-modern"{texto_id}>{status_texto}</span>'
+    '</div>'
+    '{stats}'
+    '</div>'
+    '</div>'
+)
+
+
+class FragmentCache:
+    """Trechos serializados (HTML dos componentes), guardados pelos dados que os geram.
+
+    A chave é o nome do componente e os dados que o geram (o hash do
+    conteúdo, para as séries, e os rótulos); o trecho só é montado
+    (formatação de datas e valores, modelos) quando os dados mudam.
+    Compartilhado por todas as sessões; `kind` é o tipo dos spans
+    registrados na instrumentação.
+    """
+
+    def __init__(self, size=CACHE_SIZE, kind="html"):
+        self.kind = kind
+        self._fragments = LRUCache(size)
+
+    def get(self, nome, chave, render, *dados):
+        """HTML de `render(*dados)`, guardado em (`nome`, `chave`)"""
+        chave = (nome, chave)
+        fragmento = self._fragments.get(chave)
+        if fragmento is not None:
+            instrumentation.record(self.kind, nome=nome, cache="hit", bytes=len(fragmento))
+            return fragmento
+        with instrumentation.span(self.kind, nome=nome, cache="miss") as medicao:
+            fragmento = render(*dados)
+            medicao["bytes"] = len(fragmento)
+        self._fragments.put(chave, fragmento)
+        return fragmento
+
+    def clear(self):
+        self._fragments.clear()
+
+
+# HTML das tabelas por competência e dos cards de sistema, de todas as sessões
+fragment_cache = FragmentCache()
+
+
+def _render_table(variante, coluna, valores, total, vazio):
+    corpo = [_ROW.format(rotulo=html.escape(period_label(periodo)), valor=format_brl(valor)) for periodo, valor in valores.items()]
+    if not corpo and vazio:
+        corpo.append(_EMPTY_ROW.format(texto=html.escape(vazio)))
+    if total is not None:
+        corpo.append(_TOTAL_ROW.format(valor=format_brl(total)))
+    return _TABLE.format(variante=variante, coluna=html.escape(coluna), linhas=''.join(corpo))
+
+
+def period_table(valores, coluna, variante, total=None, vazio=None):
+    """Tabela Mês → `coluna` de uma Series indexada por competência.
+
+    `variante` escolhe as cores do cabeçalho ("aberto" ou "faturamento"),
+    `total` acrescenta a linha de total e `vazio` é o aviso mostrado quando
+    não há nenhuma competência.
+    """
+    total = None if total is None else float(total)
+    chave = (variante, coluna, content_digest(valores), total, vazio)
+    return fragment_cache.get("tabela", chave, _render_table, variante, coluna, valores, total, vazio)
+
+
+def _render_card(id_card, icone, titulo, subtitulo, status, status_texto, stats, ids, verificacao):
+    if verificacao:
+        stats = stats + (("Última Verificação", _VERIFICACAO, None, True),)
+    itens = ''.join(
+        _STAT.format(
+            destaque=" highlight" if destaque else "",
+            rotulo=html.escape(rotulo),
+            classe=f" {classe}" if classe else "",
+            valor=valor if valor is _VERIFICACAO else html.escape(valor),
+        )
+        for rotulo, valor, classe, destaque in stats
+    )
+    prefixo = f"{id_card.removesuffix('-card')}-status" if ids else None
+    return _CARD.format(
+        id=id_card,
+        icone=icone,
+        titulo=html.escape(titulo),
+        subtitulo=html.escape(subtitulo),
+        badge_id=f' id="{prefixo}-badge"' if ids else "",
+        status=status,
+        indicador_id=f' id="{prefixo}"' if ids else "",
+        texto_id=f' id="{prefixo}-text"' if ids else "",
+        status_texto=html.escape(status_texto),
+        stats=f'<div class="stats-grid">{itens}</div>' if stats else "",
+    )
+
+
+def system_card(titulo, icone, status, status_texto, subtitulo="Status e Informações do Sistema", stats=(), ids=False, id_card=None,
+                verificacao=None):
+    """Card de sistema (cabeçalho com ícone, selo de status e grade de estatísticas).
+
+    `status` é a classe do indicador ("online", "warning", "offline"),
+    `icone` o HTML do ícone e `stats` uma sequência de
+    (rótulo, valor, classe do valor, destaque). Com `ids`, o selo de status
+    recebe os ids usados pelo card da visão geral. O id do card sai do
+    título, a menos que `id_card` seja informado.
+
+    `verificacao` (data e hora da verificação) vira a última estatística;
+    fica fora da chave e do HTML em cache, e é inserida a cada chamada.
+    """
+    id_card = id_card or f'{titulo.lower().replace(" ", "-")}-card'
+    dados = (id_card, icone, titulo, subtitulo, status, status_texto, tuple(stats), ids, verificacao is not None)
+    card = fragment_cache.get("card", dados, _render_card, *dados)
+    if verificacao is None:
+        return card
+    return card.replace(_VERIFICACAO, html.escape(verificacao))
@@ -0,0 +1,99 @@
+import json
+import sys
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+# Quantidade de spans mantidos no histórico do processo
+HISTORY_SIZE = 500
+
+_history = deque(maxlen=HISTORY_SIZE)
+_history_lock = threading.Lock()
+_local = threading.local()
+
+
+def start_trace():
+    """Começa a coleta dos spans registrados nesta thread (uma execução do script)"""
+    _local.spans = []
+    _local.started = time.perf_counter()
+    _local.memory = memory_mb()
+    return _local.spans
+
+
+def current_trace():
+    """Spans da execução atual desta thread (lista vazia se não houver coleta)"""
+    return getattr(_local, "spans", None) or []
+
+
+def trace_duration_ms():
+    started = getattr(_local, "started", None)
+    return (time.perf_counter() - started) * 1000 if started is not None else None
+
+
+def trace_memory():
+    """Memória (ver `memory_mb`) no início da execução atual desta thread"""
+    return getattr(_local, "memory", None) or {}
+
+
+def memory_mb():
+    """RSS atual e pico de RSS do processo, em MB ({"rss_mb", "pico_mb"}; {} se não der para medir)"""
+    try:
+        campos = {}
+        with open("/proc/self/status", encoding="ascii") as f:
+            for linha in f:
+                nome, _, valor = linha.partition(":")
+                if nome in ("VmRSS", "VmHWM"):
+                    campos[nome] = int(valor.split()[0]) / 1024
+        return {"rss_mb": round(campos["VmRSS"], 1), "pico_mb": round(campos["VmHWM"], 1)}
+    except (OSError, KeyError, ValueError):
+        pass
+    try:
+        import resource
+    except ImportError:
+        return {}
+    # ru_maxrss vem em KB no Linux e em bytes no macOS
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return {"pico_mb": round(pico / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)}
+
+
+def record(kind, **fields):
+    """Registra um span já medido no histórico do processo e na execução atual"""
+    data = {"kind": kind, "at": time.time(), "thread": threading.current_thread().name}
+    data.update(fields)
+    with _history_lock:
+        _history.append(data)
+    spans = getattr(_local, "spans", None)
+    if spans is not None:
+        spans.append(data)
+    return data
+
+
+@contextmanager
+def span(kind, **fields):
+    """Mede o bloco e registra um span com a duração (ms) e o erro, se houver.
+
+    O dicionário devolvido pode ser completado dentro do bloco (status,
+    bytes, resultado do cache...).
+    """
+    data = dict(fields)
+    started = time.perf_counter()
+    try:
+        yield data
+    except Exception as e:
+        data["error"] = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        data["duration_ms"] = round((time.perf_counter() - started) * 1000, 1)
+        record(kind, **data)
+
+
+def history(limit=None):
+    """Spans mais recentes do processo (todas as sessões e threads)"""
+    with _history_lock:
+        spans = list(_history)
+    return spans[-limit:] if limit else spans
+
+
+def dump_json(spans):
+    return json.dumps(spans, ensure_ascii=False, indent=2, default=str)
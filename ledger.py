@@ -0,0 +1,215 @@
+import hashlib
+import threading
+import weakref
+
+import numpy as np
+import pandas as pd
+
+import instrumentation
+from blocks import TOTAL_KEYWORDS, segment_blocks
+from money import parse_brl
+from schema import header_fingerprint, schema_cache
+
+# Tipo de cada linha da aba: cabeçalho do bloco, lançamento, linha TOTAL ou fora de um bloco
+ROW_KINDS = ['competencia', 'item', 'total', 'fora']
+
+COLUMNS = ['contrato', 'bloco', 'kind', 'fim', 'situacao', 'total', 'valor']
+
+# Contadores das atualizações do livro (`LedgerCache.stats`): abas convertidas de novo e abas sem mudança
+STATS = ['contratos_recalculados', 'contratos_reaproveitados']
+
+# Situação dos lançamentos já pagos
+SITUACAO_PAGO = 'OK'
+
+
+def _empty():
+    ledger = pd.DataFrame({
+        'contrato': pd.Categorical([]),
+        'bloco': np.zeros(0, dtype=np.int32),
+        'kind': pd.Categorical([], categories=ROW_KINDS),
+        'fim': np.zeros(0, dtype=bool),
+        'situacao': pd.Categorical([]),
+        'total': np.zeros(0),
+        'valor': np.zeros(0),
+    }, columns=COLUMNS)
+    ledger.index = pd.PeriodIndex([], freq='M', name='period')
+    return ledger
+
+
+def row_hashes(df):
+    """Hash (uint64) do conteúdo de cada linha da aba"""
+    return pd.util.hash_pandas_object(df, index=False).to_numpy()
+
+
+class _Version:
+    """Versão de uma aba já convertida: hashes das linhas (na ordem da aba) e o livro"""
+
+    def __init__(self, fingerprint, hashes, ledger):
+        self.fingerprint = fingerprint
+        self.hashes = hashes
+        self.ledger = ledger
+        # Hash do conteúdo da aba (linhas e cabeçalho): identifica a versão nos agregados em cache
+        self.digest = hashlib.sha1(hashes.tobytes() + str(fingerprint).encode()).hexdigest()
+
+
+def _build(contrato, df, roles, hashes, end_keywords=TOTAL_KEYWORDS):
+    """Monta o livro de `df` (já sem linhas vazias, com os hashes `hashes` das linhas).
+
+    O livro tem uma linha por linha da aba, com o contrato, o bloco
+    COMPETENCIA → TOTAL a que pertence, o tipo da linha (`ROW_KINDS`), se é
+    a última linha do bloco (`fim`), a situação, o total faturado (coluna
+    `total`) e o valor do lançamento (coluna `open`). O índice é a
+    competência (`period`), ordenado; linhas fora de blocos ficam com NaT,
+    no fim.
+    """
+    n = len(df)
+
+    def _column(papel, converter, vazio):
+        if roles[papel] is None:
+            return np.full(n, vazio, dtype=object if vazio is None else float)
+        return converter(df[roles[papel]]).to_numpy()
+
+    situacao = _column('status', lambda s: s.astype(str).str.strip().str.upper(), None)
+    total = _column('total', parse_brl, np.nan)
+    valor = _column('open', parse_brl, np.nan)
+
+    blocos = segment_blocks(df, roles['label'], end_keywords=end_keywords)
+    starts = blocos['start'].to_numpy(dtype=np.int64)
+    ends = blocos['end'].to_numpy(dtype=np.int64)
+
+    # Bloco de cada linha (último início até a linha), -1 entre um TOTAL e a próxima COMPETENCIA
+    linhas = np.arange(n)
+    delta = np.zeros(n + 1, dtype=np.int32)
+    np.add.at(delta, starts, 1)
+    np.add.at(delta, ends + 1, -1)
+    dentro = np.cumsum(delta[:-1]) > 0
+    bloco = np.where(dentro, np.searchsorted(starts, linhas, side='right') - 1, -1).astype(np.int32)
+
+    kind = np.full(n, 'fora', dtype=object)
+    kind[dentro] = 'item'
+    kind[starts] = 'competencia'
+    kind[ends[blocos['closed'].to_numpy(dtype=bool)]] = 'total'
+    # Última linha de cada bloco: a linha TOTAL ou, em bloco sem TOTAL, a linha antes da próxima COMPETENCIA
+    fim = np.zeros(n, dtype=bool)
+    fim[ends] = True
+
+    period = pd.PeriodIndex(blocos['period'].array.take(bloco, allow_fill=True), name='period')
+
+    ledger = pd.DataFrame({
+        'contrato': pd.Categorical([contrato] * n),
+        'bloco': bloco,
+        'kind': pd.Categorical(kind, categories=ROW_KINDS),
+        'fim': fim,
+        'situacao': pd.Categorical(situacao),
+        'total': total,
+        'valor': valor,
+    }, columns=COLUMNS, index=period)
+    ledger = ledger.sort_index(kind='stable', na_position='last')
+    return _Version(header_fingerprint(df), hashes, ledger)
+
+
+def concat_ledgers(ledgers):
+    """Junta os livros de vários contratos mantendo as colunas categóricas"""
+    ledgers = [ledger for ledger in ledgers if len(ledger)]
+    if not ledgers:
+        return _empty()
+    juntos = pd.concat(ledgers)
+    for coluna in ('contrato', 'situacao'):
+        juntos[coluna] = juntos[coluna].astype(object).astype('category')
+    return juntos.sort_index(kind='stable', na_position='last')
+
+
+def billing_by_period(ledger, somente_positivos=True):
+    """Total faturado por competência, em ordem cronológica.
+
+    O total de cada bloco vem da última linha dele (`fim`): a linha TOTAL
+    ou, num bloco ainda sem TOTAL, a linha antes da próxima COMPETENCIA.
+    """
+    totais = ledger.loc[ledger['fim'].to_numpy() & ledger.index.notna(), 'total'].dropna()
+    if somente_positivos:
+        totais = totais[totais > 0]
+    else:
+        totais = totais.clip(lower=0)
+    return totais.groupby(level='period').sum().sort_index()
+
+
+def open_items(ledger):
+    """Lançamentos em aberto (situação diferente de OK)"""
+    mascara = (ledger['kind'] == 'item').to_numpy() & (ledger['situacao'].astype(object) != SITUACAO_PAGO).to_numpy()
+    return ledger[mascara]
+
+
+def open_by_period(ledger):
+    """Valor em aberto por competência (só competências com valor positivo)"""
+    abertos = open_items(ledger)
+    valores = abertos.loc[abertos.index.notna(), 'valor'].fillna(0).groupby(level='period').sum().sort_index()
+    return valores[valores > 0]
+
+
+def open_total(ledger):
+    return float(open_items(ledger)['valor'].fillna(0).sum())
+
+
+class LedgerCache:
+    """Livro de cada contrato, refeito só quando o conteúdo da aba muda.
+
+    As abas ficam em `tab_cache` e o mesmo objeto DataFrame é devolvido até
+    a planilha mudar: enquanto for o mesmo objeto, o livro é devolvido
+    direto. Quando chega um DataFrame novo, os hashes das linhas são
+    comparados com a versão anterior do contrato: com o mesmo conteúdo
+    (ex.: snapshot x download) o livro é reaproveitado, senão a aba é
+    convertida inteira (ver `_build`). Os hashes formam o `digest` da
+    versão, que identifica o contrato nos agregados em cache; um contrato
+    sem mudança não refaz nem o livro nem os agregados dele. `stats` conta
+    as abas convertidas e as reaproveitadas.
+
+    Cada contrato pode ter um livro por conjunto de palavras-chave de fim
+    de bloco (`end_keywords`, ver `blocks.segment_blocks`).
+    """
+
+    def __init__(self):
+        self._versions = {}
+        self._lock = threading.Lock()
+        self.stats = dict.fromkeys(STATS, 0)
+
+    def get(self, contrato, df, end_keywords=TOTAL_KEYWORDS):
+        return self.version(contrato, df, end_keywords).ledger
+
+    def version(self, contrato, df, end_keywords=TOTAL_KEYWORDS):
+        """Versão atual do contrato (livro e hash do conteúdo) para a aba `df`"""
+        chave = (contrato, tuple(end_keywords))
+        with self._lock:
+            item = self._versions.get(chave)
+        if item is not None and item[0]() is df:
+            return item[1]
+
+        anterior = item[1] if item is not None else None
+        with instrumentation.span("ledger", nome=contrato) as info:
+            limpo = df.dropna(how='all').reset_index(drop=True)
+            roles = schema_cache.roles(limpo, contrato)
+            estatistica = 'contratos_recalculados'
+            if len(limpo) == 0 or roles['label'] is None:
+                versao = _Version(None, np.zeros(0, dtype=np.uint64), _empty())
+            else:
+                hashes = row_hashes(limpo)
+                if anterior is not None and np.array_equal(anterior.hashes, hashes) and anterior.fingerprint == header_fingerprint(limpo):
+                    # Mesmo conteúdo em um novo DataFrame (ex.: snapshot x download): nada a recalcular
+                    versao = anterior
+                    estatistica = 'contratos_reaproveitados'
+                else:
+                    versao = _build(contrato, limpo, roles, hashes, chave[1])
+            info["cache"] = "hit" if versao is anterior else "miss"
+            info["linhas"] = len(limpo)
+
+        with self._lock:
+            self._versions[chave] = (weakref.ref(df), versao)
+            self.stats[estatistica] += 1
+        return versao
+
+    def clear(self):
+        with self._lock:
+            self._versions.clear()
+
+
+# Última versão do livro de cada contrato, usada por todas as sessões
+ledger_cache = LedgerCache()
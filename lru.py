@@ -0,0 +1,41 @@
+import threading
+from collections import OrderedDict
+
+# Marca de ausência: o valor guardado pode ser None
+_MISSING = object()
+
+
+class LRUCache:
+    """Dicionário limitado a `size` itens, seguro entre threads.
+
+    Ao passar do limite sai o item usado há mais tempo; `get` conta como
+    uso. Base dos caches do processo (agregados, papéis das colunas,
+    trechos de HTML e gráficos).
+    """
+
+    def __init__(self, size):
+        self.size = size
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, chave, padrao=None):
+        with self._lock:
+            valor = self._items.get(chave, _MISSING)
+            if valor is _MISSING:
+                return padrao
+            self._items.move_to_end(chave)
+            return valor
+
+    def put(self, chave, valor):
+        with self._lock:
+            self._items[chave] = valor
+            self._items.move_to_end(chave)
+            while len(self._items) > self.size:
+                self._items.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+    def __len__(self):
+        return len(self._items)
@@ -0,0 +1,112 @@
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+# Número já limpo, no formato aceito pelo cast do Arrow ("-1234.56")
+_NUMBER = r'^[+-]?(\d+\.?\d*|\.\d+)([eE][+-]?\d+)?$'
+
+# Prefixo "R$" (ou "R " com espaço) no início da célula, depois do sinal ou do parêntese, se houver
+_PREFIX = r'^([+-]?\(?)\s*R(\$|\s)'
+
+
+def _without(texto, trecho):
+    """Remove `trecho` de todas as células (só percorre a coluna de novo se ele aparecer)"""
+    if pc.any(pc.match_substring(texto, trecho)).as_py():
+        return pc.replace_substring(texto, trecho, '')
+    return texto
+
+
+def parse_brl(valores):
+    """Converte uma coluna de valores em reais ("R$ 1.234,56") para float.
+
+    Aceita "R$" com ou sem espaço, sinal antes ou depois do "R$" e
+    negativos entre parênteses ("(1.234,56)"). Células vazias ou que não
+    são números viram NaN; colunas já numéricas passam direto.
+
+    Só o "R$" do início da célula é removido ("3R5" não é um valor). A
+    coluna inteira é convertida com funções do Arrow (substituições
+    literais e um regex ancorado para o prefixo, sem lookahead), o que
+    evita a cadeia de `str.replace` que percorria a coluna seis vezes.
+    """
+    if not isinstance(valores, pd.Series):
+        valores = pd.Series(valores)
+    if pd.api.types.is_numeric_dtype(valores) and not pd.api.types.is_bool_dtype(valores):
+        return valores.astype(float)
+
+    texto = pa.array(valores.astype(str), type=pa.string(), from_pandas=True)
+    texto = pc.utf8_trim_whitespace(texto)
+    if pc.any(pc.match_substring(texto, 'R')).as_py():
+        texto = pc.replace_substring_regex(texto, _PREFIX, r'\1')
+    texto = _without(texto, ' ')
+
+    # Parênteses indicam valor negativo (formato contábil)
+    entre_parenteses = pc.match_substring(texto, '(')
+    tem_parenteses = pc.any(entre_parenteses).as_py()
+    if tem_parenteses:
+        texto = _without(pc.replace_substring(texto, '(', ''), ')')
+
+    # Com vírgula decimal, todo ponto é separador de milhar
+    com_virgula = pc.match_substring(texto, ',')
+    texto = pc.if_else(com_virgula, pc.replace_substring(texto, '.', ''), texto)
+    texto = pc.replace_substring(texto, ',', '.')
+
+    # Sem vírgula, só é milhar o ponto seguido de três dígitos ("1.234"); "1234.5" fica como está
+    ambiguo = pc.and_(pc.invert(com_virgula), pc.match_substring(texto, '.'))
+    if pc.any(ambiguo).as_py():
+        corrigido = pc.replace_substring_regex(pc.filter(texto, ambiguo), r'\.(\d{3})', r'\1')
+        texto = pc.replace_with_mask(texto, ambiguo, corrigido)
+
+    texto = pc.if_else(pc.equal(texto, ''), pa.scalar(None, pa.string()), texto)
+    try:
+        numeros = pc.cast(texto, pa.float64())
+    except pa.ArrowInvalid:
+        # Há células que não são números: viram NaN
+        numeros = pc.cast(pc.if_else(pc.match_substring_regex(texto, _NUMBER), texto, pa.scalar(None, pa.string())), pa.float64())
+
+    numeros = numeros.to_numpy(zero_copy_only=False)
+    if tem_parenteses:
+        negativos = entre_parenteses.to_numpy(zero_copy_only=False)
+        numeros = np.where(negativos == True, -np.abs(numeros), numeros)  # noqa: E712
+    return pd.Series(numeros, index=valores.index, name=valores.name)
+
+
+def format_brl(valor):
+    """Formata um número em reais: 1234.5 → "R$ 1.234,50" (NaN → "R$ 0,00")"""
+    if valor is None or pd.isna(valor):
+        valor = 0
+    texto = f"{abs(valor):,.2f}".translate(str.maketrans(',.', '.,'))
+    return f"-R$ {texto}" if round(valor, 2) < 0 else f"R$ {texto}"
+
+
+def format_brl_column(valores):
+    """Versão de `format_brl` para uma coluna inteira (retorna uma Series de texto).
+
+    Os valores são arredondados para centavos inteiros e os grupos de
+    milhar são montados com aritmética inteira e concatenação do Arrow.
+    """
+    indice = valores.index if isinstance(valores, pd.Series) else None
+    numeros = pd.to_numeric(pd.Series(valores), errors='coerce').fillna(0).to_numpy(dtype=float)
+    centavos = np.rint(numeros * 100).astype(np.int64)
+    negativos = centavos < 0
+    centavos = np.abs(centavos)
+    inteiros = centavos // 100
+
+    grupos = 1
+    while (inteiros >= 1000 ** grupos).any():
+        grupos += 1
+    partes = []
+    for grupo in reversed(range(grupos)):
+        parte = pc.cast(pa.array(inteiros // 1000 ** grupo % 1000), pa.string())
+        if grupo < grupos - 1:
+            # Grupos internos com zeros à esquerda; o mais alto de cada valor, sem
+            parte = pc.if_else(pa.array(inteiros < 1000 ** (grupo + 1)), parte, pc.utf8_lpad(parte, width=3, padding='0'))
+        if grupo > 0:
+            # Grupos acima do tamanho do valor ficam nulos e são pulados na junção
+            parte = pc.if_else(pa.array(inteiros < 1000 ** grupo), pa.scalar(None, pa.string()), parte)
+        partes.append(parte)
+    inteiro = pc.binary_join_element_wise(*partes, '.', null_handling='skip')
+    decimais = pc.utf8_lpad(pc.cast(pa.array(centavos % 100), pa.string()), width=2, padding='0')
+    prefixo = pc.if_else(pa.array(negativos), '-R$ ', 'R$ ')
+    texto = pc.binary_join_element_wise(prefixo, inteiro, ',', decimais, '')
+    return pd.Series(texto.to_pylist(), index=indice, dtype=object)
@@ -0,0 +1,146 @@
+import re
+import unicodedata
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+MESES = ['JANEIRO', 'FEVEREIRO', 'MARÇO', 'ABRIL', 'MAIO', 'JUNHO', 'JULHO', 'AGOSTO', 'SETEMBRO', 'OUTUBRO', 'NOVEMBRO', 'DEZEMBRO']
+MESES_ABREV = ['JAN', 'FEV', 'MAR', 'ABR', 'MAI', 'JUN', 'JUL', 'AGO', 'SET', 'OUT', 'NOV', 'DEZ']
+
+_ENGLISH = ['JANUARY', 'FEBRUARY', 'MARCH', 'APRIL', 'MAY', 'JUNE', 'JULY', 'AUGUST', 'SEPTEMBER', 'OCTOBER', 'NOVEMBER', 'DECEMBER']
+
+
+def _plain(texto):
+    texto = unicodedata.normalize('NFKD', str(texto)).encode('ascii', 'ignore').decode()
+    return texto.upper().strip()
+
+
+# Nome (sem acentos) → número do mês: nomes completos, abreviações e inglês
+MONTH_NAMES = {}
+for _numero, _nomes in enumerate(zip(MESES, MESES_ABREV, _ENGLISH), start=1):
+    for _nome in _nomes:
+        MONTH_NAMES[_plain(_nome)] = _numero
+        MONTH_NAMES.setdefault(_plain(_nome)[:3], _numero)
+MONTH_NAMES['SEPT'] = 9
+
+# Formatos de data reconhecidos, em ordem: dd/mm/aaaa, aaaa-mm(-dd), mm/aaaa
+_DMY = re.compile(r'\b\d{1,2}[/.-](\d{1,2})[/.-](\d{4}|\d{2})\b')
+_ISO = re.compile(r'\b(\d{4})[/.-](\d{1,2})\b')
+_MY = re.compile(r'\b(\d{1,2})[/.-](\d{4}|\d{2})\b')
+_WORD = re.compile(r'[A-Z]+')
+_YEAR = re.compile(r'^\W*(?:DE\W+)?(\d{4}|\d{2})\b')
+
+# Tabela de normalização: texto da célula → (ano, mês), preenchida sob demanda
+_TABLE = {}
+TABLE_SIZE = 50_000
+
+
+def _year(texto):
+    ano = int(texto)
+    return ano + 2000 if ano < 100 else ano
+
+
+def _valid(ano, mes):
+    return 1 <= mes <= 12 and (ano == 0 or 1900 <= ano <= 2200)
+
+
+def parse_period(texto):
+    """Converte o texto de uma célula em (ano, mês); ano 0 = sem ano, (0, 0) = não é mês.
+
+    Aceita nomes e abreviações ("OUTUBRO", "out/25", "Outubro de 2025"),
+    datas ("01/10/2025", "2025-10-01") e mês/ano ("10/2025").
+    """
+    if texto is None or (isinstance(texto, float) and np.isnan(texto)):
+        return (0, 0)
+    texto = _plain(texto)
+    for pattern, ordem in ((_DMY, (2, 1)), (_ISO, (1, 2)), (_MY, (2, 1))):
+        match = pattern.search(texto)
+        if match:
+            ano, mes = _year(match.group(ordem[0])), int(match.group(ordem[1]))
+            if _valid(ano, mes):
+                return (ano, mes)
+    for match in _WORD.finditer(texto):
+        mes = MONTH_NAMES.get(match.group())
+        if mes:
+            ano = _YEAR.match(texto[match.end():])
+            return (_year(ano.group(1)) if ano else 0, mes)
+    return (0, 0)
+
+
+def parse_periods(valores):
+    """Versão de `parse_period` para uma coluna: retorna os arrays (anos, meses).
+
+    Cada texto distinto é normalizado uma única vez (e guardado na tabela do
+    processo); a coluna é resolvida com uma consulta vetorizada pelos códigos.
+    """
+    codigos, distintos = pd.factorize(pd.Series(valores, dtype=object), use_na_sentinel=True)
+    pares = np.zeros((len(distintos) + 1, 2), dtype=np.int32)
+    for idx, texto in enumerate(distintos):
+        chave = str(texto)
+        par = _TABLE.get(chave)
+        if par is None:
+            if len(_TABLE) >= TABLE_SIZE:
+                _TABLE.clear()
+            par = _TABLE[chave] = parse_period(texto)
+        pares[idx] = par
+    # O sentinel -1 (célula vazia) aponta para a última linha, (0, 0)
+    resolvidos = pares[codigos]
+    return resolvidos[:, 0], resolvidos[:, 1]
+
+
+def _code(ano, mes):
+    return ano * 12 + mes - 1
+
+
+def resolve_periods(anos, meses, hoje=None):
+    """Completa uma sequência cronológica de (ano, mês) e retorna um PeriodIndex mensal.
+
+    Meses sem ano herdam o ano do período anterior (virando o ano quando o
+    mês volta); itens sem mês são o mês seguinte ao anterior (ou o anterior
+    ao seguinte). Sem nenhum ano na sequência, o último mês conhecido é
+    considerado o mais recente até `hoje`. Itens sem referência ficam NaT.
+    """
+    n = len(meses)
+    codes = [_code(int(a), int(m)) if a and m else None for a, m in zip(anos, meses)]
+    seeds = [i for i, c in enumerate(codes) if c is not None]
+    if not seeds:
+        com_mes = [i for i in range(n) if meses[i]]
+        if not com_mes:
+            return pd.PeriodIndex([pd.NaT] * n, freq='M')
+        hoje = hoje or date.today()
+        j = com_mes[-1]
+        mes = int(meses[j])
+        codes[j] = _code(hoje.year if mes <= hoje.month else hoje.year - 1, mes)
+        seeds = [j]
+
+    anchor = codes[seeds[0]]
+    for i in range(seeds[0] + 1, n):
+        if codes[i] is None:
+            if meses[i]:
+                codes[i] = _code(anchor // 12, int(meses[i]))
+                if codes[i] <= anchor:
+                    codes[i] += 12
+            else:
+                codes[i] = anchor + 1
+        anchor = codes[i]
+
+    anchor = codes[seeds[0]]
+    for i in range(seeds[0] - 1, -1, -1):
+        if meses[i]:
+            codes[i] = _code(anchor // 12, int(meses[i]))
+            if codes[i] >= anchor:
+                codes[i] -= 12
+        else:
+            codes[i] = anchor - 1
+        anchor = codes[i]
+
+    return pd.PeriodIndex([pd.Period(year=c // 12, month=c % 12 + 1, freq='M') for c in codes], freq='M')
+
+
+def period_label(periodo, curto=False):
+    """Rótulo do período para exibição: "OUTUBRO/2025" (ou "OUT/2025" com `curto`)"""
+    if periodo is None or pd.isna(periodo):
+        return ""
+    nomes = MESES_ABREV if curto else MESES
+    return f"{nomes[periodo.month - 1]}/{periodo.year}"
@@ -0,0 +1,47 @@
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class BackgroundRefresher:
+    """Atualiza periodicamente, fora das execuções do Streamlit, os recursos da planilha.
+
+    Uma única thread por processo revalida `urls` ({nome: url}) no
+    `cache` a cada `interval` segundos. As sessões continuam lendo a
+    última versão boa do cache, sem esperar pela rede.
+    """
+
+    def __init__(self, cache, urls, interval):
+        self.cache = cache
+        self.urls = dict(urls)
+        self.interval = interval
+        self.last_run = None
+        self.last_errors = {}
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None and self.interval > 0:
+            self._thread = threading.Thread(target=self._run, name="sheets-refresher", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def run_once(self):
+        self.last_errors = self.cache.refresh(self.urls)
+        self.last_run = time.time()
+        for nome, erro in self.last_errors.items():
+            logger.warning("Falha ao atualizar %s: %s", nome, erro)
+
+    def _run(self):
+        # Primeira rodada imediata: aquece o cache das abas dos contratos
+        while not self._stop.is_set():
+            try:
+                self.run_once()
+            except Exception:
+                logger.exception("Erro na atualização em segundo plano")
+            self._stop.wait(self.interval)
@@ -0,0 +1,125 @@
+import hashlib
+import json
+import logging
+import os
+
+import instrumentation
+from lru import LRUCache
+
+logger = logging.getLogger(__name__)
+
+# Papéis das colunas de uma aba de contrato:
+# - label: rótulos das linhas (COMPETÊNCIA, nome do mês, TOTAL)
+# - status: situação do pagamento ("OK" = pago)
+# - total: total faturado do mês (linha TOTAL de cada bloco)
+# - open: valor em aberto de cada linha
+ROLES = ('label', 'status', 'total', 'open')
+
+# Posição padrão das colunas no layout atual das abas dos contratos
+DEFAULT_POSITIONS = {'label': 0, 'total': 3, 'open': 7}
+
+STATUS_KEYWORDS = ['situa', 'status', 'situação', 'situacao', 'sit']
+
+# Quantidade de esquemas (cabeçalhos distintos) mantidos em cache
+CACHE_SIZE = 256
+
+
+def _load_overrides(texto):
+    """Lê COLUMN_ROLES: JSON {contrato ou "*": {papel: nome ou índice da coluna}}"""
+    if not texto:
+        return {}
+    try:
+        overrides = json.loads(texto)
+        if not isinstance(overrides, dict):
+            raise ValueError("esperado um objeto JSON")
+        return {str(nome).upper(): dict(papeis) for nome, papeis in overrides.items()}
+    except (ValueError, TypeError) as e:
+        logger.warning("COLUMN_ROLES ignorado: %s", e)
+        return {}
+
+
+# Papéis definidos manualmente, por contrato ("*" vale para todos). Ex.:
+# COLUMN_ROLES='{"UPAS": {"status": "SITUAÇÃO", "open": 7}, "*": {"total": "TOTAL"}}'
+COLUMN_OVERRIDES = _load_overrides(os.getenv("COLUMN_ROLES", ""))
+
+
+def header_fingerprint(df):
+    """Hash do cabeçalho da aba (nomes e tipos das colunas)"""
+    esquema = [(str(col), str(dtype)) for col, dtype in df.dtypes.items()]
+    return hashlib.sha1(repr(esquema).encode()).hexdigest()
+
+
+def _by_keyword(df, keywords):
+    for col in df.columns:
+        col_lower = str(col).lower().strip()
+        if any(keyword in col_lower for keyword in keywords):
+            return col
+    return None
+
+
+def _status_by_values(df):
+    # Primeira coluna com "OK" ou números entre os valores
+    for col in df.columns:
+        unique_vals = df[col].astype(str).str.upper().unique()
+        if 'OK' in unique_vals or any(val.isdigit() for val in unique_vals if isinstance(val, str) and val.strip()):
+            return col
+    return None
+
+
+def infer_roles(df):
+    """Identifica o papel das colunas de `df` pelo nome e por uma amostra dos valores"""
+    colunas = list(df.columns)
+    roles = {
+        papel: colunas[posicao] if len(colunas) > posicao else None
+        for papel, posicao in DEFAULT_POSITIONS.items()
+    }
+    roles['status'] = _by_keyword(df, STATUS_KEYWORDS) or _status_by_values(df)
+    return roles
+
+
+def _resolve(df, coluna):
+    """Nome da coluna a partir do nome ou da posição configurada (None se não existir)"""
+    if isinstance(coluna, int) and not isinstance(coluna, bool):
+        return df.columns[coluna] if -len(df.columns) <= coluna < len(df.columns) else None
+    return coluna if coluna in df.columns else None
+
+
+class SchemaCache:
+    """Papéis das colunas por cabeçalho de aba, inferidos uma única vez.
+
+    A inferência percorre os valores únicos das colunas (à procura da
+    situação); como o cabeçalho das abas quase nunca muda, o resultado é
+    guardado pela impressão digital do cabeçalho e as execuções seguintes
+    só calculam o hash. Os papéis de COLUMN_ROLES têm prioridade sobre os
+    inferidos.
+    """
+
+    def __init__(self, overrides=None, size=CACHE_SIZE):
+        self.overrides = COLUMN_OVERRIDES if overrides is None else overrides
+        self._roles = LRUCache(size)
+
+    def roles(self, df, nome=None):
+        """Retorna {papel: coluna} de `df` (aba do contrato `nome`)"""
+        fingerprint = header_fingerprint(df)
+        roles = self._roles.get(fingerprint)
+        if roles is not None:
+            instrumentation.record("schema", nome=nome, cache="hit")
+        else:
+            with instrumentation.span("schema", nome=nome, cache="miss"):
+                roles = infer_roles(df)
+            self._roles.put(fingerprint, roles)
+        return self._apply_overrides(df, dict(roles), nome)
+
+    def _apply_overrides(self, df, roles, nome):
+        for chave in ('*', str(nome).upper()):
+            for papel, coluna in self.overrides.get(chave, {}).items():
+                if papel in ROLES:
+                    roles[papel] = _resolve(df, coluna)
+        return roles
+
+    def clear(self):
+        self._roles.clear()
+
+
+# Papéis das colunas por cabeçalho de aba, inferidos uma vez para todas as sessões
+schema_cache = SchemaCache()
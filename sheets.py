@@ -0,0 +1,608 @@
+import hashlib
+import http.cookiejar
+import io
+import os
+import re
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from io import BytesIO
+from urllib.parse import unquote, urlparse
+from urllib.request import url2pathname
+
+import openpyxl
+import pandas as pd
+import pyarrow as pa
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+import instrumentation
+from compact import COMPACT_DTYPES, compact
+
+# Limites do download paralelo das abas
+MAX_WORKERS = 8
+CONNECT_TIMEOUT = 5
+REQUEST_TIMEOUT = 30
+
+# Novas tentativas (com backoff exponencial: 0,5s, 1s, 2s) em 429 e erros 5xx
+MAX_RETRIES = 3
+RETRY_BACKOFF = 0.5
+RETRY_STATUS = (429, 500, 502, 503, 504)
+
+# Bytes lidos do início de cada resposta para identificar o formato
+SNIFF_SIZE = 8192
+
+# Tempo de vida das abas no cache compartilhado (mesmo TTL do st.cache_data)
+CACHE_TTL = 300
+
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+    'Accept-Encoding': 'gzip, deflate',
+}
+
+_SHEET_ID_RE = re.compile(r'docs\.google\.com/spreadsheets/d/([a-zA-Z0-9-_]+)')
+_GID_RE = re.compile(r'[?&#]gid=(\d+)')
+
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_session():
+    """Sessão HTTP única do processo, usada em todas as requisições de planilhas.
+
+    Mantém um pool de conexões keep-alive (reaproveitando o TLS), negocia
+    gzip e repete requisições que falham com 429/5xx. Cookies são
+    descartados, então a sessão não guarda estado entre requisições e pode
+    ser usada por várias threads ao mesmo tempo.
+    """
+    global _session
+    with _session_lock:
+        if _session is None:
+            retry = Retry(
+                total=MAX_RETRIES,
+                backoff_factor=RETRY_BACKOFF,
+                status_forcelist=RETRY_STATUS,
+                allowed_methods=frozenset(['GET', 'HEAD']),
+                respect_retry_after_header=True,
+                raise_on_status=False,
+            )
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=MAX_WORKERS, max_retries=retry)
+            session = requests.Session()
+            session.headers.update(HEADERS)
+            session.cookies.set_policy(http.cookiejar.DefaultCookiePolicy(allowed_domains=[]))
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+            _session = session
+        return _session
+
+
+def http_get(url, headers=None, timeout=REQUEST_TIMEOUT, stream=False):
+    """GET pela sessão compartilhada, com timeouts de conexão e leitura"""
+    return get_session().get(url, headers=headers, timeout=(CONNECT_TIMEOUT, timeout), stream=stream)
+
+
+def parse_sheet_url(url):
+    """Extrai (sheet_id, gid) de qualquer URL do Google Sheets.
+
+    Aceita links de edição, de exportação e do gviz; o gid pode estar na
+    query string ou no hash. Retorna None se a URL não for do Google Sheets.
+    """
+    match = _SHEET_ID_RE.search(url or "")
+    if not match:
+        return None
+    gid_match = _GID_RE.search(url)
+    return match.group(1), (gid_match.group(1) if gid_match else "")
+
+
+def tab_url(sheet_id, gid):
+    """URL canônica de exportação CSV de uma aba da planilha"""
+    url = f"https://docs.google.com/spreadsheets/d/{sheet_id}/export?format=csv"
+    if gid:
+        url += f"&gid={gid}"
+    return url
+
+
+def check_response(response):
+    """Valida o status HTTP de uma planilha, com mensagens amigáveis"""
+    # Erro 400 geralmente significa que a planilha não está pública
+    if response.status_code == 400:
+        raise Exception(
+            "Erro 400: A planilha pode não estar pública. "
+            "Por favor, certifique-se de que a planilha está configurada como 'Público' ou "
+            "'Qualquer pessoa com o link pode visualizar' no Google Sheets."
+        )
+
+    response.raise_for_status()
+
+
+def check_head(head):
+    """Valida o início do corpo: o Google devolve uma página HTML (login) para planilhas privadas"""
+    inicio = head.lstrip(b'\xef\xbb\xbf \t\r\n')[:64].lower()
+    if inicio.startswith((b'<!doctype html', b'<html')) or b'Sign in' in head:
+        raise Exception(
+            "A planilha não está acessível publicamente. "
+            "Por favor, configure a planilha como 'Público' ou 'Qualquer pessoa com o link pode visualizar'."
+        )
+
+
+def _gid(url):
+    sheet_ref = parse_sheet_url(url)
+    return (sheet_ref[1] or None) if sheet_ref else None
+
+
+def workbook_url(sheet_id):
+    """URL de exportação da planilha inteira (todas as abas) em XLSX"""
+    return f"https://docs.google.com/spreadsheets/d/{sheet_id}/export?format=xlsx"
+
+
+def is_workbook_url(url):
+    sheet_ref = parse_sheet_url(url)
+    return bool(sheet_ref) and not sheet_ref[1] and 'format=xlsx' in url
+
+
+def canonical_url(url):
+    """URL canônica de um recurso.
+
+    Abas do Google Sheets viram a URL de exportação CSV; a exportação XLSX
+    sem gid representa a planilha inteira e é mantida.
+    """
+    if is_workbook_url(url):
+        return workbook_url(parse_sheet_url(url)[0])
+    sheet_ref = parse_sheet_url(url)
+    return tab_url(*sheet_ref) if sheet_ref else url
+
+
+def _column_names(header):
+    """Nomes de colunas como o pd.read_csv geraria (Unnamed: N, duplicadas com .1)"""
+    names = []
+    seen = {}
+    for idx, value in enumerate(header):
+        name = f"Unnamed: {idx}" if value is None or str(value).strip() == "" else str(value)
+        if name in seen:
+            seen[name] += 1
+            name = f"{name}.{seen[name]}"
+        else:
+            seen[name] = 0
+        names.append(name)
+    return names
+
+
+def parse_workbook(source, sheet_names=None):
+    """Parseia as abas de um XLSX em {título da aba: DataFrame}.
+
+    Usa o leitor streaming do openpyxl (read_only, somente valores), sem
+    montar o modelo completo da planilha em memória. `sheet_names` limita
+    as abas lidas.
+    """
+    if isinstance(source, (bytes, bytearray)):
+        source = BytesIO(source)
+    workbook = openpyxl.load_workbook(source, read_only=True, data_only=True)
+    try:
+        frames = {}
+        for worksheet in workbook.worksheets:
+            if sheet_names is not None and worksheet.title not in sheet_names:
+                continue
+            rows = worksheet.iter_rows(values_only=True)
+            header = next(rows, None)
+            if header is None:
+                frames[worksheet.title] = pd.DataFrame()
+                continue
+            # Descartar colunas vazias à direita (o leitor streaming pode reportá-las)
+            width = len(header)
+            while width > 0 and header[width - 1] is None:
+                width -= 1
+            data = [row[:width] for row in rows]
+            df = pd.DataFrame(data, columns=_column_names(header[:width]))
+            frames[worksheet.title] = df.dropna(how='all').reset_index(drop=True) if len(df) else df
+        return frames
+    finally:
+        workbook.close()
+
+
+# Assinaturas dos formatos binários (XLSX é um zip; XLS é um documento OLE2)
+_MAGIC_ZIP = b'PK\x03\x04'
+_MAGIC_OLE2 = b'\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1'
+
+
+class BodyStream(io.RawIOBase):
+    """Corpo da resposta lido em blocos, direto do socket, calculando o hash do que passa.
+
+    `head` são os bytes já lidos para identificar o formato; eles são
+    entregues primeiro e o restante vem de `read` (já descompactado).
+    """
+
+    def __init__(self, head, read=None):
+        self._head = memoryview(head)
+        self._read = read
+        self.hash = hashlib.sha1()
+        self.size = 0
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        if len(self._head):
+            n = min(len(buffer), len(self._head))
+            buffer[:n] = self._head[:n]
+            self._head = self._head[n:]
+        else:
+            data = self._read(len(buffer)) if self._read else b''
+            n = len(data)
+            buffer[:n] = data
+        self.hash.update(memoryview(buffer)[:n])
+        self.size += n
+        return n
+
+    def drain(self):
+        """Consome o que sobrou do corpo (para o hash cobrir o conteúdo inteiro)"""
+        while self.read(65536):
+            pass
+
+    def hexdigest(self):
+        return self.hash.hexdigest()
+
+
+def parse_stream(stream, head):
+    """Parseia o corpo de um recurso, escolhendo o parser pelos primeiros bytes.
+
+    CSV vira um DataFrame, lido direto do stream, sem guardar o corpo
+    inteiro nem decodificá-lo para str. Arquivos Excel viram
+    {título da aba: DataFrame}; eles precisam de acesso aleatório e são
+    lidos para um buffer.
+    """
+    if head.startswith(_MAGIC_ZIP):
+        return parse_workbook(BytesIO(stream.read()))
+    if head.startswith(_MAGIC_OLE2):
+        return pd.read_excel(BytesIO(stream.read()), sheet_name=None)
+    return pd.read_csv(io.BufferedReader(stream, buffer_size=65536))
+
+
+class HttpResource:
+    """Recurso HTTP(S), pedido com GET condicional pela sessão compartilhada"""
+
+    def __init__(self, url, previous=None, timeout=REQUEST_TIMEOUT):
+        headers = {}
+        if previous is not None:
+            if previous.etag:
+                headers['If-None-Match'] = previous.etag
+            if previous.last_modified:
+                headers['If-Modified-Since'] = previous.last_modified
+        self.response = http_get(url, headers=headers, timeout=timeout, stream=True)
+        # 304: a versão em cache continua válida
+        self.status = self.response.status_code
+        self.not_modified = previous is not None and self.status == 304
+        self.etag = self.response.headers.get('ETag')
+        self.last_modified = self.response.headers.get('Last-Modified')
+        if not self.not_modified:
+            try:
+                check_response(self.response)
+            except Exception:
+                self.response.close()
+                raise
+
+    def read(self, size):
+        return self.response.raw.read(size, decode_content=True)
+
+    def close(self):
+        self.response.close()
+
+
+class FileResource:
+    """Arquivo local (file://); data de modificação e tamanho fazem o papel do ETag"""
+
+    def __init__(self, url, previous=None, timeout=None):
+        path = file_path(url)
+        stat = os.stat(path)
+        self.etag = f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+        self.last_modified = None
+        self.not_modified = previous is not None and previous.etag == self.etag
+        # Status equivalente ao HTTP, para a instrumentação
+        self.status = 304 if self.not_modified else 200
+        self._file = None if self.not_modified else open(path, 'rb')
+
+    def read(self, size):
+        return self._file.read(size)
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+
+
+def file_path(url):
+    """Caminho local de uma URL file://"""
+    return url2pathname(unquote(urlparse(url).path))
+
+
+def open_resource(url, previous=None, timeout=REQUEST_TIMEOUT):
+    """Abre o recurso da URL com o transporte adequado ao esquema (http, https, file)"""
+    if url.startswith('file:'):
+        return FileResource(url, previous, timeout)
+    return HttpResource(url, previous, timeout)
+
+
+def _compact(data, info):
+    """Compacta os tipos das colunas recém-parseadas e anota no span a memória antes/depois"""
+    if not COMPACT_DTYPES:
+        return data
+    started = time.perf_counter()
+    data, relatorio = compact(data)
+    info["compact_ms"] = round((time.perf_counter() - started) * 1000, 1)
+    info["memoria_antes"] = sum(item["bytes_antes"] for item in relatorio)
+    info["memoria_depois"] = sum(item["bytes_depois"] for item in relatorio)
+    info["colunas"] = relatorio
+    # Devolver ao sistema a memória das colunas originais (o pool do Arrow a retém)
+    pa.default_memory_pool().release_unused()
+    return data
+
+
+class _Entry:
+    """Estado de um recurso no cache: DataFrame (via Future) e validadores HTTP"""
+
+    __slots__ = ("checked_at", "updated_at", "future", "etag", "last_modified", "digest", "fetch")
+
+    def __init__(self, future, previous=None):
+        self.checked_at = time.monotonic()
+        self.updated_at = None
+        self.future = future
+        # Validadores da última versão conhecida (usados na revalidação)
+        self.etag = previous.etag if previous else None
+        self.last_modified = previous.last_modified if previous else None
+        self.digest = previous.digest if previous else None
+        # Span do download que produziu esta versão (instrumentação)
+        self.fetch = None
+
+
+class TabCache:
+    """Cache de abas compartilhado pelo processo, indexado pela URL canônica.
+
+    Abas do Google Sheets são identificadas por (sheet_id, gid): cada aba é
+    baixada e parseada no máximo uma vez por TTL, não importa por qual URL
+    foi pedida. Downloads simultâneos do mesmo recurso (várias sessões ou
+    páginas) compartilham a mesma requisição em andamento.
+
+    Quando o TTL expira o recurso é revalidado: enviamos If-None-Match /
+    If-Modified-Since quando a origem forneceu ETag / Last-Modified e, na
+    falta deles, comparamos o hash do corpo. Se nada mudou (304 ou mesmo
+    hash), o DataFrame anterior é mantido, sem novo parse, e a versão
+    (`version`) continua a mesma para quem depende dela.
+
+    A revalidação segue o modelo stale-while-revalidate: só o primeiro
+    carregamento bloqueia; depois disso quem lê recebe na hora a última
+    versão boa enquanto a atualização roda em segundo plano. Se a
+    atualização falhar, a versão anterior continua valendo.
+    Os DataFrames devolvidos são compartilhados: não devem ser modificados.
+    """
+
+    def __init__(self, ttl=CACHE_TTL, max_workers=MAX_WORKERS, timeout=REQUEST_TIMEOUT):
+        self.ttl = ttl
+        self.timeout = timeout
+        self.max_workers = max_workers
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._refreshing = {}
+        # Snapshot em disco (SnapshotStore), gravado a cada atualização bem-sucedida
+        self.store = None
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="sheets")
+
+    def _download(self, url, entry, previous):
+        try:
+            with instrumentation.span("fetch", url=url, gid=_gid(url), revalidacao=previous is not None) as info:
+                entry.fetch = info
+                resource = open_resource(url, previous, self.timeout)
+                info["status"] = resource.status
+                try:
+                    df = self._read_body(resource, entry, previous, info)
+                finally:
+                    resource.close()
+        except Exception as e:
+            with self._lock:
+                if previous is None:
+                    # Falha no primeiro carregamento não fica em cache: a próxima chamada tenta de novo
+                    if self._entries.get(url) is entry:
+                        del self._entries[url]
+                else:
+                    # Falha na atualização: manter a última versão boa até o próximo TTL
+                    previous.checked_at = time.monotonic()
+                    self._refreshing.pop(url, None)
+            entry.future.set_exception(e)
+            return
+
+        entry.updated_at = time.time()
+        with self._lock:
+            self._entries[url] = entry
+            self._refreshing.pop(url, None)
+        entry.future.set_result(df)
+
+        if self.store is not None:
+            changed = previous is None or df is not previous.future.result()
+            self.store.save(url, df, entry.digest, entry.etag, entry.last_modified, entry.updated_at, write_data=changed)
+
+    def _read_body(self, resource, entry, previous, info):
+        if resource.not_modified:
+            info["resultado"] = "não modificado"
+            return previous.future.result()
+
+        entry.etag = resource.etag
+        entry.last_modified = resource.last_modified
+
+        # Ler só o início do corpo para detectar páginas de erro e o formato
+        head = resource.read(SNIFF_SIZE)
+        check_head(head)
+        stream = BodyStream(head, resource.read)
+
+        if previous is not None and not (entry.etag or entry.last_modified):
+            # Sem validadores na origem: comparar o hash do conteúdo antes de parsear
+            content = stream.read()
+            info["bytes"] = stream.size
+            if stream.hexdigest() == previous.digest:
+                info["resultado"] = "conteúdo igual"
+                return previous.future.result()
+            entry.digest = stream.hexdigest()
+            started = time.perf_counter()
+            df = parse_stream(BodyStream(content), head)
+            info["parse_ms"] = round((time.perf_counter() - started) * 1000, 1)
+            info["resultado"] = "parseado"
+            return _compact(df, info)
+
+        # CSV é parseado enquanto chega: o tempo de parse inclui a leitura da rede
+        started = time.perf_counter()
+        df = parse_stream(stream, head)
+        info["parse_ms"] = round((time.perf_counter() - started) * 1000, 1)
+        stream.drain()
+        info["bytes"] = stream.size
+        entry.digest = stream.hexdigest()
+        # Origem ignorou a requisição condicional mas o conteúdo é o mesmo
+        if previous is not None and entry.digest == previous.digest:
+            info["resultado"] = "conteúdo igual"
+            return previous.future.result()
+        info["resultado"] = "parseado"
+        return _compact(df, info)
+
+    def _lookup(self, url, force=False):
+        """Retorna (entrada, situação no cache) para a URL, disparando o download se preciso.
+
+        Situações: "hit" (versão válida), "stale" (versão expirada servida
+        enquanto atualiza), "miss" (primeiro download) e "pending"
+        (primeiro download já em andamento).
+        """
+        with self._lock:
+            current = self._entries.get(url)
+            if current is None:
+                entry = _Entry(Future())
+                self._entries[url] = entry
+                self._executor.submit(self._download, url, entry, None)
+                return entry, "miss"
+
+            # Primeiro carregamento ainda em andamento: aguardar por ele
+            if not current.future.done():
+                return current, "pending"
+
+            refresh = self._refreshing.get(url)
+            if refresh is None and (force or time.monotonic() - current.checked_at >= self.ttl):
+                refresh = _Entry(Future(), current)
+                self._refreshing[url] = refresh
+                self._executor.submit(self._download, url, refresh, current)
+
+        # Atualização forçada espera pelo resultado; leitura normal recebe a versão atual
+        if force:
+            return refresh, "refresh"
+        return current, ("stale" if refresh is not None else "hit")
+
+    def get_urls(self, urls, errors=None):
+        """Retorna {nome: DataFrame} para os recursos `urls` ({nome: url}).
+
+        Recursos que faltam no cache (ou expirados) são baixados em paralelo;
+        as falhas são registradas em `errors` (se informado) e omitidas do
+        resultado. Cada consulta gera um span "cache" na instrumentação.
+        """
+        if errors is None:
+            errors = {}
+        if not urls:
+            return {}
+
+        started = time.perf_counter()
+        lookups = {nome: (canonical_url(url),) + self._lookup(canonical_url(url)) for nome, url in urls.items()}
+        # Prazo total: um timeout por tentativa em cada "rodada" de workers
+        rodadas = -(-len(lookups) // self.max_workers)
+        wait([entry.future for _, entry, _ in lookups.values()], timeout=self.timeout * (MAX_RETRIES + 1) * rodadas)
+        wait_ms = round((time.perf_counter() - started) * 1000, 1)
+
+        frames = {}
+        for nome, (url, entry, outcome) in lookups.items():
+            future = entry.future
+            fields = {"nome": nome, "url": url, "gid": _gid(url), "cache": outcome, "duration_ms": wait_ms}
+            if outcome in ("miss", "pending") and entry.fetch:
+                for key in ("status", "bytes", "parse_ms", "resultado"):
+                    if key in entry.fetch:
+                        fields[key] = entry.fetch[key]
+            if not future.done():
+                errors[nome] = TimeoutError(f"Tempo esgotado ao carregar a aba {nome}")
+            elif future.exception() is not None:
+                errors[nome] = future.exception()
+            else:
+                frames[nome] = future.result()
+            if nome in errors:
+                fields["error"] = f"{type(errors[nome]).__name__}: {errors[nome]}"
+            instrumentation.record("cache", **fields)
+        return frames
+
+    def get(self, url):
+        """Retorna o DataFrame de um único recurso (levanta a exceção em caso de falha)"""
+        errors = {}
+        frames = self.get_urls({url: url}, errors)
+        if url in errors:
+            raise errors[url]
+        return frames[url]
+
+    def refresh(self, urls):
+        """Revalida agora os recursos `urls` ({nome: url}), ignorando o TTL.
+
+        Espera as requisições terminarem e retorna {nome: exceção} das que
+        falharam; as versões anteriores continuam disponíveis nesses casos.
+        """
+        futures = {nome: self._lookup(canonical_url(url), force=True)[0].future for nome, url in urls.items()}
+        rodadas = -(-len(futures) // self.max_workers) if futures else 0
+        wait(futures.values(), timeout=self.timeout * (MAX_RETRIES + 1) * rodadas)
+        errors = {}
+        for nome, future in futures.items():
+            if not future.done():
+                errors[nome] = TimeoutError(f"Tempo esgotado ao atualizar {nome}")
+            elif future.exception() is not None:
+                errors[nome] = future.exception()
+        return errors
+
+    def restore(self, urls):
+        """Carrega do snapshot em disco os recursos `urls` ({nome: url}) ainda ausentes do cache.
+
+        As versões restauradas são servidas na hora e já nascem expiradas:
+        a primeira leitura (ou o atualizador) dispara a revalidação em
+        segundo plano, usando os validadores e o hash gravados no snapshot.
+        Retorna os nomes restaurados.
+        """
+        restored = []
+        if self.store is None:
+            return restored
+        for nome, url in urls.items():
+            url = canonical_url(url)
+            if url in self._entries:
+                continue
+            snapshot = self.store.load(url)
+            if snapshot is None:
+                continue
+            data, manifest = snapshot
+            # Snapshots gravados antes da compactação voltam com os tipos originais
+            with instrumentation.span("compact", url=url, gid=_gid(url)) as info:
+                data = _compact(data, info)
+            entry = _Entry(Future())
+            entry.checked_at = float('-inf')
+            entry.updated_at = manifest.get('updated_at')
+            entry.etag = manifest.get('etag')
+            entry.last_modified = manifest.get('last_modified')
+            entry.digest = manifest.get('digest')
+            entry.future.set_result(data)
+            with self._lock:
+                if url not in self._entries:
+                    self._entries[url] = entry
+                    restored.append(nome)
+        return restored
+
+    def updated_at(self, url):
+        """Instante (time.time) da última versão válida da URL (None se ausente)"""
+        entry = self._entries.get(canonical_url(url))
+        return entry.updated_at if entry else None
+
+    def version(self, url):
+        """Hash do conteúdo atualmente em cache para a URL (None se ausente)"""
+        entry = self._entries.get(canonical_url(url))
+        return entry.digest if entry else None
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._refreshing.clear()
+
+
+# Cache único do processo, compartilhado por todas as sessões
+tab_cache = TabCache()
@@ -0,0 +1,133 @@
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import time
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+
+logger = logging.getLogger(__name__)
+
+
+class SnapshotStore:
+    """Cópia local, em disco, da última versão boa de cada planilha baixada.
+
+    Cada recurso (URL canônica) vira um arquivo Arrow IPC sem compressão,
+    que pode ser lido com memory-map, mais um manifesto JSON com os
+    validadores HTTP e o hash do conteúdo. Abas de uma planilha inteira
+    (XLSX) ficam em um arquivo por aba. As gravações são atômicas
+    (arquivo temporário + os.replace), então um processo interrompido
+    nunca deixa um snapshot pela metade.
+
+    Colunas com tipos misturados (o XLSX mantém o tipo de cada célula:
+    datas, números e textos na mesma coluna) são gravadas como texto, que
+    é como o app as lê (`astype(str)`); o manifesto lista essas colunas.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _key(self, url):
+        return hashlib.sha1(url.encode()).hexdigest()[:16]
+
+    def _path(self, url, suffix):
+        return os.path.join(self.directory, f"{self._key(url)}{suffix}")
+
+    def _write_atomic(self, path, write):
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        os.close(fd)
+        try:
+            write(tmp)
+            os.replace(tmp, path)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+
+    def _write_frame(self, path, df):
+        """Grava `df` em `path`; retorna as colunas que precisaram ser gravadas como texto"""
+        table, como_texto = _arrow_table(df)
+        self._write_atomic(path, lambda tmp: feather.write_feather(table, tmp, compression="uncompressed"))
+        return como_texto
+
+    def save(self, url, data, digest, etag=None, last_modified=None, updated_at=None, write_data=True):
+        """Grava o snapshot de `url` (DataFrame ou {título: DataFrame})"""
+        manifest_path = self._path(url, ".json")
+        manifest = {
+            "url": url,
+            "digest": digest,
+            "etag": etag,
+            "last_modified": last_modified,
+            "updated_at": updated_at or time.time(),
+            "sheets": list(data) if isinstance(data, dict) else None,
+        }
+        try:
+            if write_data or not os.path.exists(manifest_path):
+                if isinstance(data, dict):
+                    manifest["text_columns"] = [
+                        self._write_frame(self._path(url, f".{idx}.arrow"), df)
+                        for idx, df in enumerate(data.values())
+                    ]
+                else:
+                    manifest["text_columns"] = self._write_frame(self._path(url, ".arrow"), data)
+            # O manifesto é gravado por último: só aponta para dados completos
+            self._write_atomic(manifest_path, lambda tmp: _write_json(tmp, manifest))
+        except Exception as e:
+            logger.warning("Não foi possível gravar o snapshot de %s: %s", url, e)
+
+    def load(self, url):
+        """Retorna (dados, manifesto) do snapshot de `url`, ou None se não houver"""
+        manifest_path = self._path(url, ".json")
+        if not os.path.exists(manifest_path):
+            return None
+        try:
+            with open(manifest_path, encoding="utf-8") as f:
+                manifest = json.load(f)
+            if manifest.get("sheets") is not None:
+                data = {
+                    title: _read_frame(self._path(url, f".{idx}.arrow"))
+                    for idx, title in enumerate(manifest["sheets"])
+                }
+            else:
+                data = _read_frame(self._path(url, ".arrow"))
+            return data, manifest
+        except Exception as e:
+            logger.warning("Snapshot de %s ignorado: %s", url, e)
+            return None
+
+
+def _as_text(valores):
+    """Coluna com as células preenchidas convertidas em str (vazias continuam vazias)"""
+    texto = valores.astype(object).map(str, na_action='ignore')
+    return texto.astype('category') if isinstance(valores.dtype, pd.CategoricalDtype) else texto
+
+
+def _arrow_table(df):
+    """Tabela Arrow de `df` e a lista das colunas que só puderam ser convertidas como texto"""
+    try:
+        return pa.Table.from_pandas(df, preserve_index=False), []
+    except (pa.ArrowInvalid, pa.ArrowTypeError, TypeError, ValueError):
+        pass
+    df = df.copy(deep=False)
+    como_texto = []
+    for posicao, coluna in enumerate(df.columns):
+        valores = df.iloc[:, posicao]
+        try:
+            pa.array(valores, from_pandas=True)
+        except (pa.ArrowInvalid, pa.ArrowTypeError, TypeError, ValueError):
+            df.isetitem(posicao, _as_text(valores))
+            como_texto.append(str(coluna))
+    return pa.Table.from_pandas(df, preserve_index=False), como_texto
+
+
+def _write_json(path, data):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+
+
+def _read_frame(path):
+    return feather.read_table(path, memory_map=True).to_pandas()
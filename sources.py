@@ -0,0 +1,214 @@
+import os
+import unicodedata
+from pathlib import Path
+
+import pandas as pd
+
+from sheets import file_path, parse_sheet_url, tab_cache, tab_url, workbook_url
+
+# Estratégia de download das abas do Google Sheets: "tabs" (um CSV por aba,
+# em paralelo) ou "workbook" (a planilha inteira em um único XLSX)
+FETCH_MODE = os.getenv("SHEETS_FETCH_MODE", "tabs").strip().lower()
+
+# Extensões aceitas nos diretórios locais, em ordem de preferência
+LOCAL_EXTENSIONS = (".csv", ".xlsx", ".xls")
+
+# Nome do arquivo da planilha principal em um diretório local
+MAIN_FILE_NAME = "principal"
+
+# Título da aba principal no XLSX do Google Sheets (modo "workbook"), quando o gid
+# da DATA_URL não é o de um contrato; o XLSX não traz os gids das abas
+MAIN_SHEET_NAME = os.getenv("MAIN_SHEET_NAME", "").strip()
+
+
+def _normalize_name(nome):
+    nome = unicodedata.normalize('NFKD', str(nome)).encode('ascii', 'ignore').decode()
+    return ' '.join(nome.upper().split())
+
+
+def match_sheet_names(titles, nomes):
+    """Mapeia {nome: título da aba}, ignorando caixa, acentos e espaços extras"""
+    by_key = {_normalize_name(title): title for title in titles}
+    return {nome: by_key[_normalize_name(nome)] for nome in nomes if _normalize_name(nome) in by_key}
+
+
+def first_sheet(data):
+    """Planilha inteira ({título: DataFrame}) vira a primeira aba; DataFrames passam direto"""
+    if isinstance(data, dict):
+        return next(iter(data.values()), pd.DataFrame())
+    return data
+
+
+class DataSource:
+    """Origem dos dados do dashboard: planilha principal e abas dos contratos.
+
+    Todas as origens passam pelo mesmo cache (`tab_cache`), com a mesma
+    revalidação, atualização em segundo plano, snapshot e parse; elas só
+    diferem em como localizam cada aba.
+    """
+
+    # Se a origem tem abas próprias por contrato
+    has_tabs = True
+
+    def __init__(self, main_url, cache=tab_cache):
+        self.main_url = main_url
+        self.cache = cache
+
+    def tab_urls(self, contratos):
+        """{nome: url} das abas de contrato baixadas individualmente"""
+        return {}
+
+    def workbook(self):
+        """URL de uma planilha inteira que contém as abas por nome (ou None)"""
+        return None
+
+    def refresh_urls(self, contratos):
+        """Recursos mantidos atualizados em segundo plano"""
+        urls = {"principal": self.main_url}
+        if self.workbook():
+            urls["planilha"] = self.workbook()
+        urls.update(self.tab_urls(contratos))
+        return urls
+
+    def load_main(self):
+        """DataFrame da planilha principal (a primeira aba, se for uma planilha inteira)"""
+        return first_sheet(self.cache.get(self.main_url))
+
+    def load_tabs(self, contratos, errors=None):
+        """Retorna {nome: DataFrame} das abas `contratos` ({nome: gid}).
+
+        As abas que não puderem ser carregadas são registradas em `errors`
+        (se informado) e omitidas do resultado.
+        """
+        if errors is None:
+            errors = {}
+        if not contratos or not self.has_tabs:
+            return {}
+
+        nomes = list(contratos)
+        urls = self.tab_urls(contratos)
+        frames = self.cache.get_urls(urls, errors) if urls else {}
+
+        pendentes = [nome for nome in nomes if nome not in urls]
+        if pendentes and self.workbook():
+            try:
+                abas = self.cache.get(self.workbook())
+            except Exception as e:
+                abas = {}
+                for nome in pendentes:
+                    errors[nome] = e
+            if isinstance(abas, dict):
+                titulos = match_sheet_names(abas, pendentes)
+                for nome in pendentes:
+                    if nome in titulos:
+                        frames[nome] = abas[titulos[nome]]
+        for nome in pendentes:
+            if nome not in frames and nome not in errors:
+                errors[nome] = KeyError(f"Aba '{nome}' não encontrada na planilha")
+
+        # Manter a ordem dos contratos
+        return {nome: frames[nome] for nome in nomes if nome in frames}
+
+
+class GoogleSheetsSource(DataSource):
+    """Planilha do Google Sheets: abas localizadas pelo gid (CSV) ou pelo nome (XLSX).
+
+    No modo "workbook" a planilha principal também sai do XLSX, pelo título:
+    o do contrato com o mesmo gid da URL, `main_sheet`, ou a primeira aba se
+    a URL não tiver gid. Com um gid desconhecido, ela continua baixada à
+    parte, em CSV.
+    """
+
+    def __init__(self, main_url, fetch_mode=FETCH_MODE, cache=tab_cache, contratos=None, main_sheet=MAIN_SHEET_NAME):
+        super().__init__(main_url, cache)
+        self.sheet_id, self.main_gid = parse_sheet_url(main_url)
+        self.fetch_mode = fetch_mode
+        por_gid = {str(gid): nome for nome, gid in (contratos or {}).items() if gid}
+        self.main_sheet = main_sheet or por_gid.get(self.main_gid)
+
+    def _main_in_workbook(self):
+        return self.fetch_mode == "workbook" and bool(self.main_sheet or not self.main_gid)
+
+    def load_main(self):
+        if not self._main_in_workbook():
+            return super().load_main()
+        abas = self.cache.get(self.workbook())
+        if not self.main_sheet:
+            return first_sheet(abas)
+        titulo = match_sheet_names(abas, [self.main_sheet]).get(self.main_sheet)
+        if titulo is None:
+            raise KeyError(f"Aba '{self.main_sheet}' não encontrada na planilha")
+        return abas[titulo]
+
+    def refresh_urls(self, contratos):
+        urls = super().refresh_urls(contratos)
+        if self._main_in_workbook():
+            del urls["principal"]
+        return urls
+
+    def tab_urls(self, contratos):
+        if self.fetch_mode == "workbook":
+            return {}
+        return {nome: tab_url(self.sheet_id, str(gid)) for nome, gid in contratos.items() if gid}
+
+    def workbook(self):
+        return workbook_url(self.sheet_id) if self.fetch_mode == "workbook" else None
+
+
+class UrlSource(DataSource):
+    """Arquivo único, local (file://) ou remoto, em CSV ou Excel.
+
+    Um arquivo Excel pode trazer as abas dos contratos, localizadas pelo
+    nome; um CSV só tem a planilha principal.
+    """
+
+    def __init__(self, main_url, cache=tab_cache):
+        super().__init__(main_url, cache)
+        extensao = os.path.splitext(main_url.split('?')[0])[1].lower()
+        self.has_tabs = extensao in (".xlsx", ".xls")
+
+    def workbook(self):
+        return self.main_url if self.has_tabs else None
+
+    def refresh_urls(self, contratos):
+        return {"principal": self.main_url}
+
+
+class DirectorySource(DataSource):
+    """Diretório local com um arquivo por contrato (UPAS.csv, EVOLUIR.xlsx...).
+
+    A planilha principal é o arquivo `principal.*`; se não existir, usa o
+    arquivo do primeiro contrato encontrado.
+    """
+
+    def __init__(self, directory, contratos, cache=tab_cache):
+        self.directory = directory
+        self._files = {}
+        for entry in sorted(os.scandir(directory), key=lambda e: e.name):
+            stem, extensao = os.path.splitext(entry.name)
+            if entry.is_file() and extensao.lower() in LOCAL_EXTENSIONS:
+                self._files.setdefault(_normalize_name(stem), Path(entry.path).resolve().as_uri())
+        main_url = self._files.get(_normalize_name(MAIN_FILE_NAME))
+        if main_url is None:
+            main_url = next((self._files[_normalize_name(nome)] for nome in contratos if _normalize_name(nome) in self._files), None)
+        if main_url is None:
+            # Sem arquivos: o erro aparece ao carregar a planilha principal
+            main_url = Path(directory, f"{MAIN_FILE_NAME}.csv").resolve().as_uri()
+        super().__init__(main_url, cache)
+
+    def tab_urls(self, contratos):
+        return {nome: self._files[_normalize_name(nome)] for nome in contratos if _normalize_name(nome) in self._files}
+
+
+def open_source(data_url, contratos, fetch_mode=FETCH_MODE):
+    """Escolhe a origem de dados pela URL configurada em DATA_URL.
+
+    - link do Google Sheets: abas dos contratos pelo gid (ou XLSX inteiro);
+    - file:///caminho/diretorio: um arquivo por contrato;
+    - file:///caminho/arquivo.xlsx ou URL http(s) de CSV/Excel: arquivo único.
+    """
+    if parse_sheet_url(data_url):
+        return GoogleSheetsSource(data_url, fetch_mode, contratos=contratos)
+    if data_url.startswith('file:') and os.path.isdir(file_path(data_url)):
+        return DirectorySource(file_path(data_url), contratos)
+    return UrlSource(data_url)
@@ -0,0 +1,67 @@
+import hashlib
+import logging
+import os
+import re
+
+logger = logging.getLogger(__name__)
+
+# Textos entre aspas ficam intactos na minificação (ex.: :contains("Visão Geral"))
+_STRINGS = re.compile(r'("(?:\\.|[^"\\])*"|\'(?:\\.|[^\'\\])*\')')
+_COMMENTS = re.compile(r'/\*.*?\*/', re.S)
+_SPACES = re.compile(r'\s+')
+_AROUND = re.compile(r'\s*([{};,>])\s*')
+# Depois de ":" e antes de "!important" o espaço nunca muda o sentido
+_AFTER = re.compile(r':\s+|\s+(?=!)')
+
+
+def minify_css(texto):
+    """CSS sem comentários e sem espaços desnecessários (o conteúdo entre aspas é preservado)"""
+    partes = _STRINGS.split(_COMMENTS.sub('', texto))
+    # Posições pares: fora das aspas
+    for i in range(0, len(partes), 2):
+        partes[i] = _AFTER.sub(lambda m: m.group().strip(), _AROUND.sub(r'\1', _SPACES.sub(' ', partes[i])))
+    return ''.join(partes).replace(';}', '}').strip()
+
+
+def build_stylesheet(caminho, static_dir=None):
+    """Folha de estilo `caminho` minificada; retorna (nome do arquivo publicado ou None, CSS).
+
+    O nome publicado leva o hash do conteúdo (`theme.3f2a….min.css`): o
+    navegador guarda o arquivo e um CSS novo muda a URL. Com `static_dir`,
+    o arquivo é gravado lá (se ainda não existir) para ser servido pelo
+    Streamlit em app/static/, e as versões anteriores da mesma folha
+    (`theme.*.min.css` com outro hash) são apagadas; sem ele, ou se a
+    gravação falhar, o nome é None e o CSS deve ir embutido na página.
+    """
+    with open(caminho, encoding='utf-8') as arquivo:
+        css = minify_css(arquivo.read())
+    if static_dir is None:
+        return None, css
+    base = os.path.splitext(os.path.basename(caminho))[0]
+    nome = f"{base}.{hashlib.sha1(css.encode()).hexdigest()[:12]}.min.css"
+    destino = os.path.join(static_dir, nome)
+    if not os.path.exists(destino):
+        try:
+            temporario = f"{destino}.{os.getpid()}.tmp"
+            with open(temporario, 'w', encoding='utf-8') as arquivo:
+                arquivo.write(css)
+            os.replace(temporario, destino)
+        except OSError as e:
+            logger.warning("Folha de estilo %s não publicada em %s: %s", caminho, static_dir, e)
+            return None, css
+    _remove_old(static_dir, base, nome)
+    return nome, css
+
+
+def _remove_old(static_dir, base, atual):
+    """Apaga de `static_dir` as versões de `base` publicadas antes de `atual` (outro hash no nome)"""
+    anteriores = re.compile(rf'{re.escape(base)}\.[0-9a-f]{{12}}\.min\.css')
+    for arquivo in os.listdir(static_dir):
+        if arquivo != atual and anteriores.fullmatch(arquivo):
+            try:
+                os.remove(os.path.join(static_dir, arquivo))
+            except FileNotFoundError:
+                # Já apagada por outro processo
+                pass
+            except OSError as e:
+                logger.warning("Versão antiga da folha de estilo não removida (%s): %s", arquivo, e)
@@ -0,0 +1,97 @@
+import threading
+import weakref
+
+import numpy as np
+import pandas as pd
+
+import instrumentation
+
+# Sistemas monitorados, na ordem dos cards
+SISTEMAS = ["Viva Saúde", "Coop Vitta", "Delta"]
+
+
+class SystemPartition:
+    """Linhas da planilha principal de cada sistema, calculadas em uma passada.
+
+    A coluna de empresa é fatorada e só os valores distintos são comparados
+    com o nome de cada sistema (contém, sem diferenciar maiúsculas); as
+    linhas de cada sistema saem dos códigos. `codes` é o sistema de cada
+    linha (categórico, o primeiro que casar), `rows` as posições das linhas
+    de cada sistema e `status` o resumo usado pelos cards. Sem coluna de
+    empresa, todos os sistemas ficam com a planilha inteira.
+    """
+
+    def __init__(self, df, empresa_column, sistemas=SISTEMAS):
+        self.sistemas = list(sistemas)
+        n = len(df)
+        self._filtros = {}
+        if empresa_column is None:
+            self._codigos, self._distintos = None, []
+            self.codes = pd.Categorical.from_codes(np.full(n, -1), categories=self.sistemas)
+            self.rows = {sistema: np.arange(n) for sistema in self.sistemas}
+        else:
+            codigos, distintos = pd.factorize(df[empresa_column], use_na_sentinel=True)
+            self._codigos, self._distintos = codigos, list(distintos)
+            textos = [str(valor).casefold() for valor in distintos]
+            # Uma linha a mais (sempre falsa) para o sentinel -1 das células vazias
+            casa = np.zeros((len(distintos) + 1, len(self.sistemas)), dtype=bool)
+            for j, sistema in enumerate(self.sistemas):
+                casa[:len(textos), j] = [sistema.casefold() in texto for texto in textos]
+            por_linha = casa[codigos]
+            primeiro = np.where(por_linha.any(axis=1), por_linha.argmax(axis=1), -1)
+            self.codes = pd.Categorical.from_codes(primeiro, categories=self.sistemas)
+            self.rows = {sistema: np.flatnonzero(por_linha[:, j]) for j, sistema in enumerate(self.sistemas)}
+        # Se houver dados na planilha, todos os sistemas são considerados operacionais
+        self.status = {
+            sistema: {'status': 'ok', 'count': len(self.rows[sistema])}
+            for sistema in self.sistemas
+        }
+
+    def filter_rows(self, nome):
+        """Posições das linhas cuja empresa é exatamente `nome`; sem nenhuma, as que contêm `nome`"""
+        if self._codigos is None:
+            return self.rows.get(nome, np.zeros(0, dtype=np.intp))
+        linhas = self._filtros.get(nome)
+        if linhas is None:
+            exatos = [i for i, valor in enumerate(self._distintos) if valor == nome]
+            if exatos:
+                linhas = np.flatnonzero(np.isin(self._codigos, exatos))
+            elif nome in self.rows:
+                linhas = self.rows[nome]
+            else:
+                contem = [i for i, valor in enumerate(self._distintos) if nome.casefold() in str(valor).casefold()]
+                linhas = np.flatnonzero(np.isin(self._codigos, contem))
+            self._filtros[nome] = linhas
+        return linhas
+
+
+class SystemPartitionCache:
+    """Partição da versão atual da planilha principal, compartilhada pelo processo.
+
+    A planilha vem de `tab_cache`, que devolve o mesmo DataFrame até os
+    dados mudarem; a partição é guardada com uma referência fraca para ele
+    e recalculada só quando chega uma versão nova.
+    """
+
+    def __init__(self):
+        self._entry = None
+        self._lock = threading.Lock()
+
+    def get(self, df, empresa_column):
+        with self._lock:
+            entry = self._entry
+        if entry is not None and entry[0]() is df and entry[1] == empresa_column:
+            return entry[2]
+        with instrumentation.span("sistemas", nome=empresa_column, cache="miss"):
+            particao = SystemPartition(df, empresa_column)
+        with self._lock:
+            self._entry = (weakref.ref(df), empresa_column, particao)
+        return particao
+
+    def clear(self):
+        with self._lock:
+            self._entry = None
+
+
+# Linhas de cada sistema na versão atual da planilha principal (uma partição por processo)
+system_partitions = SystemPartitionCache()
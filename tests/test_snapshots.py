@@ -0,0 +1,54 @@
+"""Snapshot em disco de planilhas lidas do XLSX (células com tipos misturados)."""
+import datetime
+import io
+import os
+import sys
+
+import openpyxl
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from compact import compact  # noqa: E402
+from sheets import parse_workbook  # noqa: E402
+from snapshots import SnapshotStore  # noqa: E402
+
+
+def _workbook():
+    """XLSX com uma aba de contrato: data, textos e números na mesma coluna"""
+    workbook = openpyxl.Workbook()
+    aba = workbook.active
+    aba.title = "UPAS"
+    aba.append(["MÊS", "SITUAÇÃO", "LOTE", "TOTAL", "VALOR"])
+    aba.append(["COMPETÊNCIA", None, None, None, None])
+    aba.append([datetime.datetime(2025, 10, 1), "OK", 1, 1234.5, "R$ 10,00"])
+    aba.append(["UNIDADE 1", "PENDENTE", "A", "R$ 1.234,50", 7])
+    aba.append(["UNIDADE 2", "OK", 1, None, "R$ 7,00"])
+    aba.append(["UNIDADE 3", "OK", "A", None, "R$ 0,00"])
+    aba.append(["TOTAL", None, 1, 1234.5, "R$ 17,00"])
+    dados = io.BytesIO()
+    workbook.save(dados)
+    return dados.getvalue()
+
+
+def test_round_trip_de_planilha_com_data(tmp_path):
+    abas, _ = compact(parse_workbook(_workbook()))
+    assert isinstance(abas["UPAS"]["MÊS"].iloc[1], datetime.datetime)
+    # Categórica com categorias de tipos diferentes (1 e "A"), criada pela compactação
+    assert isinstance(abas["UPAS"]["LOTE"].dtype, pd.CategoricalDtype)
+
+    store = SnapshotStore(str(tmp_path))
+    store.save("file:///planilha.xlsx", abas, digest="abc")
+    snapshot = store.load("file:///planilha.xlsx")
+
+    assert snapshot is not None
+    lidas, manifesto = snapshot
+    assert manifesto["digest"] == "abc"
+    assert list(lidas) == ["UPAS"]
+    original, lida = abas["UPAS"], lidas["UPAS"]
+    assert list(lida.columns) == list(original.columns)
+    assert {"MÊS", "LOTE"} <= set(manifesto["text_columns"][0])
+    # As colunas gravadas como texto têm o mesmo texto que o app lê (astype(str)), e as vazias continuam vazias
+    for coluna in original.columns:
+        esperado = original[coluna].astype(object).map(str, na_action='ignore')
+        pd.testing.assert_series_equal(lida[coluna].astype(object).map(str, na_action='ignore'), esperado, check_dtype=False)